@@ -0,0 +1,59 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: reports which patterns occur in a text in one pass.
+
+    Matching is case-sensitive and runs in time linear in the text length,
+    however many patterns were compiled.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Patterns must be non-empty")
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].append(index)
+
+        # Breadth-first so every failure target is a shallower state whose transitions are
+        # already complete. Failure links are folded into full transition tables over the
+        # pattern alphabet, so matching is one dict lookup per character.
+        alphabet = {char for pattern in self.patterns for char in pattern}
+        self._delta = [None] * len(self._goto)
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            if state:
+                fallback = self._delta[self._fail[state]]
+                self._delta[state] = {char: self._goto[state].get(char, fallback.get(char, 0)) for char in alphabet}
+            else:
+                self._delta[state] = dict(self._goto[0])
+            for char, child in self._goto[state].items():
+                self._fail[child] = self._delta[self._fail[state]].get(char, 0) if state else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+        # Characters outside every pattern (and transitions back to the root) are left to .get's default
+        self._delta = [{char: target for char, target in row.items() if target} for row in self._delta]
+        self._step = [row.get for row in self._delta]
+
+    def matches(self, text):
+        """Indices of the patterns found anywhere in `text`"""
+        found = set()
+        step, out = self._step, self._out
+        state = 0
+        for char in text:
+            state = step[state](char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -1,12 +1,44 @@
+import logging
+import threading
+import time
 from flask import Flask, render_template, request, jsonify
-import pandas as pd
-from retriever import Retriever  # Ensure this imports your Retriever class
+from retriever import get_retriever, NO_ANSWER  # Ensure this imports your Retriever class
+from bm25_index import get_bm25_index
 
 app = Flask(__name__)
 
-# Load your QA pairs DataFrame
-qa_pairs_df = pd.read_csv(r'C:\Users\Ananya Tiwari\cdp-chatbot\qa_pairs.csv')  # Ensure this path is correct
-retriever = Retriever(qa_pairs_df)
+# Upper bound on questions accepted by a single /ask_batch call
+MAX_BATCH_SIZE = 1000
+
+# Startup progress reported by /readyz
+startup_state = {'ready': False, 'error': None, 'started_at': None, 'ready_after': None,
+                 'timings': {}, 'index': None}
+_startup_lock = threading.Lock()
+_startup_thread = None
+
+def _startup():
+    """Load the QA pairs, model, embeddings and index, then warm the model up"""
+    try:
+        retriever = get_retriever()
+        retriever.warm_up()
+        startup_state['timings'] = dict(retriever.startup_timings)
+        startup_state['index'] = retriever.index_stats()
+        startup_state['ready_after'] = time.time() - startup_state['started_at']
+        startup_state['ready'] = True
+        logging.info(f"Ready after {startup_state['ready_after']:.2f}s: {startup_state['timings']}")
+    except Exception as e:
+        startup_state['error'] = str(e)
+        logging.exception("Startup failed")
+
+def start_warmup():
+    """Kick off startup in the background; safe to call more than once (e.g. from a gunicorn post_fork hook)"""
+    global _startup_thread
+    with _startup_lock:
+        if _startup_thread is None:
+            startup_state['started_at'] = time.time()
+            _startup_thread = threading.Thread(target=_startup, name="warmup", daemon=True)
+            _startup_thread.start()
+    return _startup_thread
 
 @app.route('/')
 def home():
@@ -15,8 +47,67 @@ def home():
 @app.route('/ask', methods=['POST'])
 def ask():
     user_query = request.form['query']
-    response = retriever.retrieve(user_query)
+    top_k = request.form.get('top_k', type=int)
+    if top_k and top_k > 0:
+        # Callers that want to rerank get every candidate along with the best answer
+        candidates = get_retriever().search(user_query, top_k=top_k)
+        response = candidates[0]['answer'] if candidates else NO_ANSWER
+        return jsonify({'response': response, 'candidates': candidates})
+    response = get_retriever().retrieve(user_query)
     return jsonify({'response': response})
 
+@app.route('/ask_batch', methods=['POST'])
+def ask_batch():
+    payload = request.get_json(silent=True) or {}
+    queries = payload.get('queries')
+    top_k = payload.get('top_k', 1)
+
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        return jsonify({'error': "'queries' must be a list of strings"}), 400
+    if len(queries) > MAX_BATCH_SIZE:
+        return jsonify({'error': f"At most {MAX_BATCH_SIZE} queries per request"}), 400
+    if not isinstance(top_k, int) or top_k < 1:
+        return jsonify({'error': "'top_k' must be a positive integer"}), 400
+
+    responses = get_retriever().retrieve_many(queries, top_k=top_k)
+    return jsonify({'responses': responses})
+
+@app.route('/keyword_search', methods=['GET', 'POST'])
+def keyword_search():
+    # Lexical lookup over the scraped docs: no model involved, served from the BM25 index
+    query = request.values.get('query', '')
+    top_k = request.values.get('top_k', default=5, type=int)
+    if not query or not top_k or top_k < 1:
+        return jsonify({'error': "'query' and a positive 'top_k' are required"}), 400
+    try:
+        index = get_bm25_index()
+    except (OSError, ValueError) as e:
+        return jsonify({'error': f"Keyword index unavailable: {e}"}), 503
+    results = [{'score': score, 'doc_id': doc_id, **(index.sources[doc_id] if index.sources else {})}
+               for score, doc_id in index.search(query, top_k)]
+    return jsonify({'results': results})
+
+@app.route('/healthz')
+def healthz():
+    # Liveness only: the process is up and serving HTTP
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    start_warmup()
+    body = {
+        'ready': startup_state['ready'],
+        'error': startup_state['error'],
+        'elapsed': startup_state['ready_after'] or time.time() - startup_state['started_at'],
+        'timings': startup_state['timings'],
+        'index': startup_state['index']
+    }
+    return jsonify(body), 200 if startup_state['ready'] else 503
+
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify(get_retriever().cache_stats())
+
 if __name__ == '__main__':
+    start_warmup().join()  # Load the QA pairs, model, embeddings and index before serving
     app.run(debug=True, port=5001)  # Changed to port 5001
\ No newline at end of file
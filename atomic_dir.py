@@ -0,0 +1,55 @@
+import glob
+import os
+import shutil
+import time
+
+
+def resolve(path):
+    """The directory a published `path` currently points at; read every file of one load through it"""
+    return os.path.realpath(path)
+
+
+def publish_dir(path, write):
+    """Build a directory with `write(directory)` and publish it at `path` without a gap.
+
+    Each build goes to a versioned sibling (`<path>.v<n>`) and `path` is a
+    symlink that is swapped atomically, so readers always see a complete old
+    or new directory. The previous version is kept for readers still loading
+    it; older ones are removed. Where symlinks are unavailable the directories
+    are swapped by rename instead, which leaves a brief window without `path`.
+    """
+    path = os.path.normpath(path)
+    version = f"{path}.v{time.time_ns()}-{os.getpid()}"
+    write(version)
+    previous = resolve(path) if os.path.islink(path) else None
+
+    link = f"{path}.link.{os.getpid()}"
+    try:
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(os.path.basename(version), link)
+    except (OSError, NotImplementedError):
+        _swap_dirs(version, path)
+        return
+
+    if os.path.isdir(path) and not os.path.islink(path):
+        # A directory published before versioning: move it aside once
+        aside = f"{path}.old.{os.getpid()}"
+        os.replace(path, aside)
+        os.replace(link, path)
+        shutil.rmtree(aside, ignore_errors=True)
+    else:
+        os.replace(link, path)
+
+    keep = {resolve(version), previous}
+    for old in glob.glob(f"{glob.escape(path)}.v*"):
+        if os.path.isdir(old) and resolve(old) not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def _swap_dirs(source, path):
+    if os.path.exists(path):
+        old_path = f"{path}.old.{os.getpid()}"
+        os.replace(path, old_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    os.replace(source, path)
@@ -0,0 +1,162 @@
+import json
+import math
+import os
+import threading
+from itertools import accumulate
+import numpy as np
+from atomic_dir import publish_dir, resolve
+from text_normalizer import NORMALIZER_VERSION, normalize
+
+# Bump whenever the on-disk layout changes
+INDEX_VERSION = 1
+
+DEFAULT_BM25_PATH = os.environ.get(
+    'BM25_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bm25_index'))
+
+_lock = threading.Lock()
+_index = None
+
+
+class BM25Index:
+    """Sparse lexical index: per-term posting lists in CSR layout with precomputed BM25 impacts.
+
+    Postings of term `t` are `doc_ids[indptr[t]:indptr[t + 1]]` (ascending) with
+    matching `impacts`, so a document's score is the sum of its impacts over the
+    query terms. `max_impact[t]` bounds each list and drives MaxScore pruning.
+    Documents and queries are tokenized with the shared text normalizer.
+    """
+
+    def __init__(self, documents, sources=None, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.sources = list(sources) if sources is not None else None
+        self.vocabulary = {}
+        postings = []  # term id -> {doc id: term frequency}
+        doc_lengths = []
+        for doc_id, text in enumerate(documents):
+            tokens = normalize(text).split()
+            doc_lengths.append(len(tokens))
+            for token in tokens:
+                term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                if term_id == len(postings):
+                    postings.append({})
+                postings[term_id][doc_id] = postings[term_id].get(doc_id, 0) + 1
+
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.int32)
+        n_docs = len(doc_lengths)
+        avgdl = float(self.doc_lengths.mean()) if n_docs else 0.0
+        self.indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum([len(p) for p in postings])
+        self.doc_ids = np.empty(self.indptr[-1], dtype=np.int32)
+        self.impacts = np.empty(self.indptr[-1], dtype=np.float32)
+        self.max_impact = np.zeros(len(postings), dtype=np.float32)
+        for term_id, docs in enumerate(postings):
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            ids = np.fromiter(docs.keys(), dtype=np.int32, count=len(docs))
+            tfs = np.fromiter(docs.values(), dtype=np.float32, count=len(docs))
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1 - b + b * self.doc_lengths[ids] / avgdl)
+            self.doc_ids[start:end] = ids
+            self.impacts[start:end] = idf * tfs * (k1 + 1) / (tfs + norm)
+            self.max_impact[term_id] = self.impacts[start:end].max()
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def _postings(self, query):
+        """(upper bound, doc ids, impacts) views for every distinct indexed query term"""
+        lists = []
+        for token in set(normalize(query).split()):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            lists.append((float(self.max_impact[term_id]), self.doc_ids[start:end], self.impacts[start:end]))
+        return lists
+
+    def search(self, query, top_k=10):
+        """Top `top_k` (score, doc id) pairs, best first (ties by doc id), using MaxScore pruning.
+
+        Lists are accumulated whole, strongest bound first, into a dense score
+        array. Once the k-th best partial score reaches the summed bounds of the
+        remaining lists, no unseen document can enter the top k: those lists are
+        only probed with `searchsorted` for the candidates that can still move.
+        """
+        lists = sorted(self._postings(query), key=lambda posting: posting[0], reverse=True)
+        if not lists or top_k <= 0:
+            return []
+        remaining = list(accumulate(bound for bound, _, _ in reversed(lists)))[::-1] + [0.0]
+        scores = np.zeros(len(self), dtype=np.float64)
+        seen = np.zeros(len(self), dtype=bool)
+
+        essential = 0
+        threshold = 0.0
+        while essential < len(lists):
+            _, ids, impacts = lists[essential]
+            scores[ids] += impacts
+            seen[ids] = True
+            essential += 1
+            candidates = np.flatnonzero(seen)
+            if len(candidates) >= top_k:
+                threshold = np.partition(scores[candidates], len(candidates) - top_k)[len(candidates) - top_k]
+                if threshold >= remaining[essential]:
+                    break
+
+        for i in range(essential, len(lists)):
+            # Documents that can't reach the k-th best score even with every remaining list are settled
+            candidates = candidates[scores[candidates] + remaining[i] > threshold]
+            _, ids, impacts = lists[i]
+            positions = np.searchsorted(ids, candidates)
+            positions[positions == len(ids)] = 0
+            hits = ids[positions] == candidates
+            scores[candidates[hits]] += impacts[positions[hits]]
+
+        candidates = np.flatnonzero(seen)
+        if len(candidates) > top_k:
+            top = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            # Break ties at the k-th score by doc id, like an exhaustive scan would
+            kth = scores[candidates[top]].min()
+            candidates = candidates[scores[candidates] >= kth]
+        order = np.lexsort((candidates, -scores[candidates]))[:top_k]
+        return [(float(scores[doc]), int(doc)) for doc in candidates[order]]
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ("indptr", "doc_ids", "impacts", "max_impact", "doc_lengths"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        meta = {"version": INDEX_VERSION, "normalizer_version": NORMALIZER_VERSION,
+                "k1": self.k1, "b": self.b, "size": len(self), "terms": terms,
+                "sources": self.sources}
+        with open(os.path.join(path, "bm25.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved index; fails if it was built by another layout or normalizer"""
+        path = resolve(path)  # A republish mid-load must not mix files from two versions
+        with open(os.path.join(path, "bm25.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION or meta.get("normalizer_version") != NORMALIZER_VERSION:
+            raise ValueError(f"BM25 index at {path} is stale; rebuild it with indexer.py")
+        index = cls.__new__(cls)
+        index.k1, index.b = meta["k1"], meta["b"]
+        index.sources = meta["sources"]
+        index.vocabulary = {term: term_id for term_id, term in enumerate(meta["terms"])}
+        for name in ("indptr", "doc_ids", "impacts", "max_impact", "doc_lengths"):
+            setattr(index, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r'))
+        return index
+
+
+def save_bm25_atomic(index, path):
+    """Save the index and publish it at `path` in one step"""
+    publish_dir(path, index.save)
+
+
+def get_bm25_index(path=None):
+    """Return the process-wide keyword index, memory-mapping it on first use"""
+    global _index
+    with _lock:
+        if _index is None:
+            _index = BM25Index.load(path or DEFAULT_BM25_PATH)
+        return _index
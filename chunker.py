@@ -0,0 +1,140 @@
+import argparse
+import csv
+import logging
+import os
+from bs4 import BeautifulSoup
+from corpus_store import iter_records_with_html
+from text_normalizer import NORMALIZER_VERSION, normalize
+
+# ~180 words stays under the 256 word-piece limit of MiniLM-style encoders,
+# so no passage is silently truncated and encoder cost per item is bounded
+DEFAULT_MAX_WORDS = 180
+DEFAULT_OVERLAP = 30
+
+HEADINGS = ("h1", "h2", "h3", "h4")
+BLOCKS = ("p", "li", "pre", "td", "dt", "dd", "blockquote")
+FIELDNAMES = ["question", "answer", "processed_question", "processed_answer", "platform", "url", "normalizer_version"]
+
+
+def _content_blocks(record):
+    for line in record.get("content", "").split("\n"):
+        if line.strip():
+            yield (), line.strip()
+
+
+def _blocks(record):
+    """(heading path, text) for each block of a record, from its html when it has any"""
+    if not record.get("html"):
+        yield from _content_blocks(record)
+        return
+
+    soup = BeautifulSoup(record["html"], "html.parser")
+    path = []
+    found = False
+    for element in soup.find_all(HEADINGS + BLOCKS):
+        # A <p> inside an <li> was already emitted with its parent
+        if element.find_parent(BLOCKS):
+            continue
+        text = element.get_text(" ", strip=True)
+        if not text:
+            continue
+        if element.name in HEADINGS:
+            level = int(element.name[1])
+            path = path[:level - 1] + [text]
+        else:
+            found = True
+            yield tuple(path), text
+    # Pages built from bare <div>s (typical of the React docs) have no block tags at all
+    if not found:
+        yield from _content_blocks(record)
+
+
+def chunk_blocks(blocks, max_words=DEFAULT_MAX_WORDS, overlap=DEFAULT_OVERLAP):
+    """Pack consecutive blocks of one section into passages of at most `max_words` words.
+
+    A new heading always starts a new passage; within a section each passage
+    repeats the last `overlap` words of the previous one.
+    """
+    step = max(max_words - overlap, 1)
+    section, words, emitted = None, [], False
+
+    def flush():
+        # A tail that is only the overlap of the previous passage adds nothing new
+        if emitted and len(words) <= overlap:
+            return
+        for start in range(0, max(len(words) - overlap, 1), step):
+            yield section, " ".join(words[start:start + max_words])
+
+    for path, text in blocks:
+        if path != section:
+            if words:
+                yield from flush()
+            section, words, emitted = path, [], False
+        words.extend(text.split())
+        # Emit full passages as soon as they exist so long pages don't pile up
+        while len(words) >= max_words + step:
+            yield section, " ".join(words[:max_words])
+            words, emitted = words[step:], True
+    if words:
+        yield from flush()
+
+
+def chunk_record(record, max_words=DEFAULT_MAX_WORDS, overlap=DEFAULT_OVERLAP):
+    """Passage rows for one scraped record, labelled with title and heading path"""
+    title = record.get("title") or ""
+    rows = []
+    for path, text in chunk_blocks(_blocks(record), max_words, overlap):
+        parts = []
+        for part in (title,) + path:
+            if part and (not parts or part != parts[-1]):  # Pages often repeat their title as <h1>
+                parts.append(part)
+        context = " > ".join(parts)
+        rows.append({
+            "question": context,
+            "answer": text,
+            "processed_question": normalize(f"{context} {text}"),
+            "processed_answer": normalize(text),
+            "platform": record.get("platform"),
+            "url": record.get("url"),
+            "normalizer_version": NORMALIZER_VERSION
+        })
+    return rows
+
+
+def write_passages(data_dir, output_path, max_words=DEFAULT_MAX_WORDS, overlap=DEFAULT_OVERLAP):
+    """Stream the corpus into a passages CSV that Retriever can load next to the QA pairs"""
+    count = 0
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for record in iter_records_with_html(data_dir):
+            rows = chunk_record(record, max_words, overlap)
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def load_passages(path):
+    """Read a passages CSV; rows normalized under another normalizer version are recomputed"""
+    import pandas as pd
+    passages = pd.read_csv(path, keep_default_na=False)
+    if 'normalizer_version' not in passages or (passages['normalizer_version'] != NORMALIZER_VERSION).any():
+        passages['processed_question'] = (passages['question'] + " " + passages['answer']).map(normalize)
+        passages['processed_answer'] = passages['answer'].map(normalize)
+        passages['normalizer_version'] = NORMALIZER_VERSION
+    return passages
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Split scraped pages into overlapping passages for retrieval")
+    parser.add_argument("data_dir", nargs="?", default="cdp_data", help="Directory the scraper wrote its corpus to")
+    # Default to where get_retriever looks ($PASSAGES_PATH or passages.csv next to the modules)
+    from retriever import DEFAULT_PASSAGES_PATH
+    parser.add_argument("--output", default=DEFAULT_PASSAGES_PATH)
+    parser.add_argument("--max-words", type=int, default=DEFAULT_MAX_WORDS)
+    parser.add_argument("--overlap", type=int, default=DEFAULT_OVERLAP)
+    args = parser.parse_args()
+
+    count = write_passages(args.data_dir, args.output, args.max_words, args.overlap)
+    logging.info(f"Wrote {count} passages to {os.path.abspath(args.output)}")
@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from pathlib import Path
+
+HTML_DIR = "html"  # Side store for raw element html, kept out of the record shards
+
+
+def _open(path, mode):
+    """Open a shard as text, through gzip when it has a .gz suffix"""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _iter_lines(path):
+    """Stream JSON objects from a shard, stopping cleanly at a record cut off by a crash"""
+    try:
+        with _open(path, "r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    logging.warning(f"Ignoring truncated record at the end of {path}")
+                    return
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logging.warning(f"Skipping unreadable record in {path}: {str(e)}")
+    except (EOFError, gzip.BadGzipFile) as e:
+        logging.warning(f"Stopped reading {path} at a damaged block: {str(e)}")
+
+
+def _complete_length(path):
+    """Byte length of the prefix of `path` that holds only whole records.
+
+    For gzip that is the end of the last member that decompresses cleanly and
+    ends a line; for plain text, the end of the last line.
+    """
+    if not str(path).endswith(".gz"):
+        with open(path, "rb") as f:
+            data = f.read()
+        return data.rfind(b"\n") + 1
+
+    good = position = 0
+    last = b""
+    decompressor = zlib.decompressobj(wbits=31)
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(1 << 20)
+            if not data:
+                return good
+            while data:
+                try:
+                    out = decompressor.decompress(data)
+                except zlib.error:
+                    return good
+                last = out[-1:] or last
+                if not decompressor.eof:
+                    position += len(data)
+                    break
+                position += len(data) - len(decompressor.unused_data)
+                if last == b"\n":
+                    good = position
+                data, last = decompressor.unused_data, b""
+                decompressor = zlib.decompressobj(wbits=31)
+
+
+def _shards(directory):
+    """platform -> shard path for every record shard in `directory`"""
+    shards = {}
+    for path in sorted(Path(directory).glob("*.jsonl*")):
+        if path.name.endswith((".jsonl", ".jsonl.gz")):
+            shards[path.name.split(".jsonl")[0]] = path
+    return shards
+
+
+class CorpusWriter:
+    """Append-only JSONL corpus with one shard per platform.
+
+    Records are appended as soon as a page is scraped; their `html` is moved into
+    `html/<platform>` keyed by a content hash and replaced with an `html_id`.
+    With compression every append is its own gzip member. A crash can leave the
+    last page half-written; call `repair` before appending to a shard again so
+    that page is dropped instead of hiding everything written after it.
+    """
+
+    def __init__(self, directory, compress=True):
+        self.directory = directory
+        self.suffix = ".jsonl.gz" if compress else ".jsonl"
+        self._locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, HTML_DIR), exist_ok=True)
+
+    def _paths(self, platform):
+        return (os.path.join(self.directory, platform + self.suffix),
+                os.path.join(self.directory, HTML_DIR, platform + self.suffix))
+
+    def _platform_lock(self, platform):
+        with self._lock:
+            return self._locks.setdefault(platform, threading.Lock())
+
+    def reset(self, platform):
+        """Start the platform's shard and html store over"""
+        with self._platform_lock(platform):
+            for path in self._paths(platform):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def repair(self, platform):
+        """Cut the platform's shard and html store back to their last complete record"""
+        with self._platform_lock(platform):
+            for path in self._paths(platform):
+                if not os.path.exists(path):
+                    continue
+                length = _complete_length(path)
+                if length < os.path.getsize(path):
+                    logging.warning(f"Truncating {path} to its last complete record ({length} bytes)")
+                    with open(path, "r+b") as f:
+                        f.truncate(length)
+
+    def append(self, platform, records):
+        """Append one page's records (and their html blobs) to the platform's shard"""
+        if not records:
+            return
+        lines, blobs = [], []
+        for record in records:
+            record = dict(record)
+            html = record.pop("html", None)
+            if html is not None:
+                record["html_id"] = hashlib.sha1(html.encode("utf-8")).hexdigest()
+                blobs.append(json.dumps({"id": record["html_id"], "html": html}, ensure_ascii=False) + "\n")
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+
+        records_path, html_path = self._paths(platform)
+        with self._platform_lock(platform):
+            # Blobs first, so every html_id in the shard resolves
+            if blobs:
+                with _open(html_path, "a") as f:
+                    f.writelines(blobs)
+            with _open(records_path, "a") as f:
+                f.writelines(lines)
+
+
+def platforms(directory):
+    """Platforms that have a record shard in `directory`"""
+    return list(_shards(directory))
+
+
+def iter_records(directory, platform=None):
+    """Stream records from every shard in `directory`, or only from `platform`'s"""
+    for name, path in _shards(directory).items():
+        if platform is None or name == platform:
+            yield from _iter_lines(path)
+
+
+def iter_records_with_html(directory, platform=None):
+    """Stream records with their `html` re-attached, reading each html store alongside its shard.
+
+    Blobs are appended in record order just before their records, so one
+    forward pass over both files pairs them up without holding either in memory.
+    """
+    for name, path in _shards(directory).items():
+        if platform is not None and name != platform:
+            continue
+        html_path = _shards(os.path.join(directory, HTML_DIR)).get(name)
+        blobs = _iter_lines(html_path) if html_path is not None else iter(())
+        for record in _iter_lines(path):
+            html_id = record.get("html_id")
+            if html_id is not None:
+                for blob in blobs:
+                    if blob["id"] == html_id:
+                        record["html"] = blob["html"]
+                        break
+            yield record
@@ -0,0 +1,57 @@
+import sqlite3
+
+
+class CrawlCheckpoint:
+    """SQLite-backed crawl state: every URL ever enqueued and whether it finished.
+
+    A page's outlinks are inserted in the same transaction that marks it done,
+    so after a crash only the pages that were in flight have to be fetched again.
+    Only the scheduler thread may use an instance.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " key TEXT PRIMARY KEY, url TEXT NOT NULL, platform TEXT NOT NULL,"
+            " depth INTEGER NOT NULL, done INTEGER NOT NULL DEFAULT 0)")
+        self._conn.commit()
+
+    def has_state(self):
+        """True if an unfinished crawl left its frontier behind"""
+        return self._conn.execute("SELECT 1 FROM frontier LIMIT 1").fetchone() is not None
+
+    def load(self):
+        """Return (visited keys, pages enqueued per platform, pending (url, platform, depth) list)"""
+        visited, pages, pending = set(), {}, []
+        for key, url, platform, depth, done in self._conn.execute(
+                "SELECT key, url, platform, depth, done FROM frontier"):
+            visited.add(key)
+            pages[platform] = pages.get(platform, 0) + 1
+            if not done:
+                pending.append((url, platform, depth))
+        return visited, pages, pending
+
+    def add(self, entries):
+        """Record newly enqueued (key, url, platform, depth) entries"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (key, url, platform, depth) VALUES (?, ?, ?, ?)", entries)
+
+    def complete(self, key, children=()):
+        """Mark a page done and record the links it enqueued, atomically"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (key, url, platform, depth) VALUES (?, ?, ?, ?)", children)
+            self._conn.execute("UPDATE frontier SET done = 1 WHERE key = ?", (key,))
+
+    def clear(self):
+        """Forget the crawl once it has finished"""
+        with self._conn:
+            self._conn.execute("DELETE FROM frontier")
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+class CrawlMetrics:
+    """Per-URL, per-phase timings and per-platform counters for one crawl.
+
+    Worker threads wrap each page in `page()` and its steps in `phase()`; the
+    phase time is charged to both the page and its platform. Phases are meant
+    to be disjoint, so a page's phases add up to at most its wall time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.pages = []
+        self.platforms = {}
+
+    def _platform(self, platform):
+        if platform not in self.platforms:
+            self.platforms[platform] = {
+                "pages": 0, "first_start": None, "last_end": None,
+                "phases": {}, "counters": {}
+            }
+        return self.platforms[platform]
+
+    @contextmanager
+    def page(self, url, platform, waited=0.0):
+        """Time one page from the moment a worker picks it up, plus `waited` seconds it spent queued"""
+        record = {"url": url, "platform": platform, "phases": {}}
+        self._local.page = record
+        start = time.time() - waited
+        try:
+            yield record
+        finally:
+            end = time.time()
+            self._local.page = None
+            record["seconds"] = end - start
+            with self._lock:
+                self.pages.append(record)
+                stats = self._platform(platform)
+                stats["pages"] += 1
+                stats["first_start"] = min(stats["first_start"] or start, start)
+                stats["last_end"] = max(stats["last_end"] or end, end)
+
+    def add_time(self, name, seconds):
+        """Charge `seconds` of phase `name` to the current page"""
+        record = getattr(self._local, "page", None)
+        if record is None:
+            return
+        record["phases"][name] = record["phases"].get(name, 0.0) + seconds
+        with self._lock:
+            phase = self._platform(record["platform"])["phases"].setdefault(name, {"count": 0, "seconds": 0.0})
+            phase["count"] += 1
+            phase["seconds"] += seconds
+
+    @contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.monotonic() - start)
+
+    def count(self, name, value=1):
+        """Add to a per-platform counter (cache_hits, bytes transferred, rendered_chars, ...) for the current page"""
+        record = getattr(self._local, "page", None)
+        if record is None:
+            return
+        with self._lock:
+            counters = self._platform(record["platform"])["counters"]
+            counters[name] = counters.get(name, 0) + value
+
+    def summary(self):
+        """Per-platform totals plus every page's timings, ready for json.dump"""
+        platforms = {}
+        with self._lock:
+            for platform, stats in self.platforms.items():
+                counters = dict(stats["counters"])
+                duration = (stats["last_end"] - stats["first_start"]) if stats["pages"] else 0.0
+                lookups = counters.get("cache_hits", 0) + counters.get("cache_stale", 0) + counters.get("cache_misses", 0)
+                platforms[platform] = {
+                    "pages": stats["pages"],
+                    "seconds": duration,
+                    "pages_per_second": stats["pages"] / duration if duration else 0.0,
+                    "cache_hit_rate": counters.get("cache_hits", 0) / lookups if lookups else 0.0,
+                    "bytes": counters.get("bytes", 0),
+                    "counters": counters,
+                    "phases": {name: dict(phase) for name, phase in stats["phases"].items()}
+                }
+            pages = list(self.pages)
+        return {"platforms": platforms, "pages": pages}
+
+    def prometheus(self):
+        """The per-platform summary in Prometheus text exposition format"""
+        summary = self.summary()["platforms"]
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        metric("cdp_crawl_pages_total", "counter", "Pages processed",
+               [({"platform": p}, s["pages"]) for p, s in summary.items()])
+        metric("cdp_crawl_pages_per_second", "gauge", "Pages processed per second of crawl time",
+               [({"platform": p}, s["pages_per_second"]) for p, s in summary.items()])
+        metric("cdp_crawl_cache_hit_ratio", "gauge", "Fresh cache hits over cache lookups",
+               [({"platform": p}, s["cache_hit_rate"]) for p, s in summary.items()])
+        metric("cdp_crawl_phase_seconds_total", "counter", "Time spent per crawl phase",
+               [({"platform": p, "phase": name}, phase["seconds"])
+                for p, s in summary.items() for name, phase in s["phases"].items()])
+        metric("cdp_crawl_events_total", "counter", "Crawl counters (bytes, cache hits and misses, records)",
+               [({"platform": p, "event": name}, value)
+                for p, s in summary.items() for name, value in s["counters"].items()])
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir, name="crawl_metrics"):
+        """Export the run as <name>.json and <name>.prom in `output_dir`"""
+        json_path = os.path.join(output_dir, f"{name}.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(os.path.join(output_dir, f"{name}.prom"), 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+        logging.info(f"Crawl metrics written to {json_path}")
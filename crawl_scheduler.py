@@ -0,0 +1,178 @@
+import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from urllib.parse import urlparse
+
+
+class DomainLimiter:
+    """Per-domain politeness: caps concurrent requests to a host and spaces out their starts.
+
+    It never blocks: the scheduler thread asks how long a domain must wait and
+    only hands a URL to a worker once its domain is ready.
+    """
+
+    def __init__(self, max_concurrency=2, min_interval=1.0):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval  # Seconds between request starts on the same domain
+        self._domains = {}
+
+    @staticmethod
+    def domain(url):
+        return urlparse(url).netloc
+
+    def _state(self, domain):
+        return self._domains.setdefault(domain, {"active": 0, "next_start": 0.0})
+
+    def ready_in(self, domain, now):
+        """Seconds until a request to `domain` may start; None while all its slots are busy"""
+        state = self._state(domain)
+        if state["active"] >= self.max_concurrency:
+            return None
+        return max(state["next_start"] - now, 0.0)
+
+    def start(self, domain, now):
+        state = self._state(domain)
+        state["active"] += 1
+        state["next_start"] = max(now, state["next_start"]) + self.min_interval
+
+    def finish(self, domain):
+        self._state(domain)["active"] -= 1
+
+
+class CrawlScheduler:
+    """Frontier-based crawler that fetches many pages at once across platforms.
+
+    `fetch_page(url, platform, depth)` does the per-page work and returns
+    `(records, links)`; the scheduler owns the frontier, the visited set and the
+    per-platform page budget, and only ever touches them from the calling thread.
+    Politeness is applied there too: URLs wait in per-domain queues and are
+    handed to a worker only when one is free and their domain is ready, so a
+    busy site never ties up workers that other sites could use.
+    The visited set holds `canonicalize(url)` so URL variants are crawled once.
+    With `metrics` (a CrawlMetrics) every page is timed, including politeness waits.
+    """
+
+    def __init__(self, fetch_page, max_workers=8, limiter=None, max_depth=5, max_links_per_page=10,
+                 canonicalize=None, metrics=None):
+        self.fetch_page = fetch_page
+        self.canonicalize = canonicalize or (lambda url: url)
+        self.metrics = metrics
+        self.max_workers = max_workers
+        self.limiter = limiter or DomainLimiter()
+        self.max_depth = max_depth
+        self.max_links_per_page = max_links_per_page
+
+    def _run(self, url, platform, depth, waited):
+        with self.metrics.page(url, platform, waited=waited) if self.metrics else nullcontext():
+            if self.metrics:
+                # Time the page spent queued for its domain's slot and minimum interval
+                self.metrics.add_time("sleep", waited)
+            return self.fetch_page(url, platform, depth)
+
+    def crawl(self, seeds, max_pages=100, visited=None, on_records=None, checkpoint=None):
+        """Crawl every `platform -> root url` in `seeds` concurrently.
+
+        Returns `platform -> records`. `max_pages` is a budget per platform. If
+        `on_records(platform, records)` is given, each page's records are handed
+        to it as they arrive instead and the result is `platform -> record count`.
+        With a `checkpoint` (CrawlCheckpoint) the frontier is persisted as it
+        grows, and a crawl that left state behind resumes where it stopped.
+        """
+        visited = visited if visited is not None else set()
+        results = {platform: 0 if on_records else [] for platform in seeds}
+        pages = {platform: 0 for platform in seeds}
+        in_flight = {}
+        pending = []
+        if checkpoint is not None and checkpoint.has_state():
+            saved_visited, saved_pages, pending = checkpoint.load()
+            visited.update(saved_visited)
+            pages.update(saved_pages)
+            logging.info(f"Resuming crawl: {len(saved_visited)} URLs known, {len(pending)} still to fetch")
+
+        ready = OrderedDict()  # domain -> deque of (url, platform, depth, queued at)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawl") as executor:
+            def submit(url, platform, depth):
+                domain = self.limiter.domain(url)
+                ready.setdefault(domain, deque()).append((url, platform, depth, time.monotonic()))
+
+            def dispatch():
+                """Start every URL whose domain is ready, round-robin; return seconds until the next one is"""
+                next_ready = None
+                progress = True
+                while progress and ready and len(in_flight) < self.max_workers:
+                    progress = False
+                    now = time.monotonic()
+                    for domain in list(ready):
+                        if len(in_flight) >= self.max_workers:
+                            break
+                        delay = self.limiter.ready_in(domain, now)
+                        if delay is None:
+                            continue
+                        if delay > 0:
+                            next_ready = delay if next_ready is None else min(next_ready, delay)
+                            continue
+                        url, platform, depth, queued = ready[domain].popleft()
+                        if ready[domain]:
+                            ready.move_to_end(domain)
+                        else:
+                            del ready[domain]
+                        self.limiter.start(domain, now)
+                        future = executor.submit(self._run, url, platform, depth, now - queued)
+                        in_flight[future] = (url, platform, depth)
+                        progress = True
+                return next_ready
+
+            def enqueue(url, platform, depth, added):
+                key = self.canonicalize(url)
+                if key in visited or pages[platform] >= max_pages or depth >= self.max_depth:
+                    return False
+                visited.add(key)
+                pages[platform] += 1
+                added.append((key, url, platform, depth))
+                submit(url, platform, depth)
+                return True
+
+            for url, platform, depth in pending:
+                submit(url, platform, depth)
+            seeded = []
+            for platform, url in seeds.items():
+                enqueue(url, platform, 0, seeded)
+            if checkpoint is not None:
+                checkpoint.add(seeded)
+
+            while in_flight or ready:
+                timeout = dispatch()
+                if not in_flight:
+                    time.sleep(timeout)  # Every queued domain is inside its minimum interval
+                    continue
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, platform, depth = in_flight.pop(future)
+                    self.limiter.finish(self.limiter.domain(url))
+                    added = []
+                    try:
+                        records, links = future.result()
+                    except Exception as e:
+                        logging.error(f"Error scraping {url}: {str(e)}")
+                        records, links = [], []
+
+                    if on_records is not None:
+                        on_records(platform, records)
+                        results[platform] += len(records)
+                    else:
+                        results[platform].extend(records)
+                    # Links are only followed if the next level is still within max_depth
+                    if depth < self.max_depth - 1:
+                        followed = 0
+                        for link in links:
+                            if followed >= self.max_links_per_page:
+                                break
+                            followed += enqueue(link, platform, depth + 1, added)
+                    # Records are stored before the page is marked done, so a crash redoes it instead of losing it
+                    if checkpoint is not None:
+                        checkpoint.complete(self.canonicalize(url), added)
+
+        return results
@@ -0,0 +1,91 @@
+import hashlib
+import re
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"ref", "source", "gclid", "fbclid", "mc_cid", "mc_eid", "_ga", "_gl"}
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def canonicalize_url(url):
+    """Normalize a URL so variants of the same page compare equal.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters (utm_*, ref, ...) and trailing slashes, and sorts the query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_"))
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def _tokens(text):
+    return _WORD_RE.findall(text.lower())
+
+
+def content_hash(text):
+    """Exact fingerprint: case and whitespace differences don't count"""
+    return hashlib.sha1(" ".join(_tokens(text)).encode("utf-8")).hexdigest()
+
+
+def simhash(text, shingle_size=3):
+    """64-bit SimHash over word shingles; near-identical texts differ in few bits"""
+    tokens = _tokens(text)
+    shingles = [" ".join(tokens[i:i + shingle_size]) for i in range(max(len(tokens) - shingle_size + 1, 1))]
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+class DuplicateFilter:
+    """Remembers content fingerprints and flags exact and near-duplicate texts.
+
+    Near duplicates are texts whose SimHash is within `max_distance` bits of one
+    already seen. Fingerprints are split into `max_distance + 1` bands, so any
+    match shares at least one band exactly and only those candidates are compared.
+    """
+
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self._hashes = set()
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def is_duplicate(self, text):
+        """True if `text` was seen before (exactly or nearly); otherwise remember it"""
+        exact = content_hash(text)
+        fingerprint = simhash(text)
+        keys = self._band_keys(fingerprint)
+        with self._lock:
+            if exact in self._hashes:
+                self.exact_duplicates += 1
+                return True
+            for key in keys:
+                for other in self._buckets.get(key, ()):
+                    if bin(fingerprint ^ other).count("1") <= self.max_distance:
+                        self.near_duplicates += 1
+                        return True
+            self._hashes.add(exact)
+            for key in keys:
+                self._buckets.setdefault(key, []).append(fingerprint)
+            return False
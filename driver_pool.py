@@ -0,0 +1,151 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class DriverPool:
+    """Bounded pool of headless browser sessions leased out one page at a time.
+
+    Drivers are created lazily up to `size`, health-checked before each lease and
+    recycled once they have rendered `max_pages_per_driver` pages or their JS heap
+    grows past `max_heap_mb`, which replaces resetting a single shared driver.
+    """
+
+    def __init__(self, create_driver, size=3, max_pages_per_driver=50, max_heap_mb=512, lease_timeout=300):
+        self.create_driver = create_driver
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_heap_mb = max_heap_mb
+        self.lease_timeout = lease_timeout
+        self.recycled = 0  # Drivers replaced because they were unhealthy, old or bloated
+        self._idle = queue.LifoQueue()  # Reuse the warmest driver first; None marks a freed slot
+        self._lock = threading.Lock()
+        self._created = 0
+        self._pages = {}
+        self._closed = False
+
+    def _new_driver(self):
+        driver = self.create_driver()
+        with self._lock:
+            self._pages[id(driver)] = 0
+        return driver
+
+    def _quit(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"Error closing WebDriver: {str(e)}")
+
+    def _is_healthy(self, driver):
+        """Cheap liveness probe: the session must still answer a script call"""
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _needs_recycling(self, driver):
+        if self._pages.get(id(driver), 0) >= self.max_pages_per_driver:
+            return True
+        if self.max_heap_mb:
+            try:
+                # Chrome-only API; other browsers just skip the memory check
+                heap = driver.execute_script(
+                    "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0")
+                return (heap or 0) > self.max_heap_mb * 1024 * 1024
+            except Exception:
+                return True
+        return False
+
+    def _acquire(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._new_driver()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                driver = self._idle.get(timeout=self.lease_timeout)
+
+            if driver is None:
+                continue  # A slot was freed by a recycled driver; try to create a replacement
+            if self._is_healthy(driver):
+                return driver
+            logging.info("Discarding unhealthy WebDriver")
+            self._quit(driver)
+            self.recycled += 1
+
+    def _release(self, driver, broken=False):
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+            closed = self._closed
+        if broken or closed or self._needs_recycling(driver):
+            self._quit(driver)
+            if not closed:
+                self.recycled += 1
+                logging.info(f"Recycled WebDriver (total recycled: {self.recycled})")
+                self._idle.put(None)  # Wake a waiting lease so it can start a replacement
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def lease(self):
+        """Borrow a driver for one page; a driver whose session errors is replaced"""
+        driver = self._acquire()
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self._is_healthy(driver)
+            raise
+        finally:
+            self._release(driver, broken)
+
+    def close(self):
+        """Quit idle drivers now; drivers still leased are quit when they are returned"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                self._quit(driver)
+
+
+def wait_for_render(driver, selectors, timeout=20, idle_time=0.5, poll=0.1):
+    """Wait until the document is loaded, a content selector matches and the network goes quiet.
+
+    Network idle is approximated by the number of resource timing entries staying
+    unchanged for `idle_time` seconds. Returns False if `timeout` elapsed first.
+    """
+    selector = ", ".join(selectors) if selectors else "body"
+    deadline = time.monotonic() + timeout
+    last_count, stable_since = -1, None
+    while time.monotonic() < deadline:
+        ready, has_content, resources = driver.execute_script(
+            "return [document.readyState === 'complete',"
+            " document.querySelector(arguments[0]) !== null,"
+            " performance.getEntriesByType('resource').length];", selector)
+        now = time.monotonic()
+        if resources != last_count:
+            last_count, stable_since = resources, now
+        if ready and has_content and now - stable_since >= idle_time:
+            return True
+        time.sleep(poll)
+    return False
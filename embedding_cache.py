@@ -0,0 +1,128 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import numpy as np
+
+# Bump this whenever the on-disk layout or the hashing scheme changes
+CACHE_VERSION = 3
+
+
+def _content_key(model_name, text):
+    """Hash a processed question together with the model that embeds it"""
+    return hashlib.sha1(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+
+def content_keys(model_name, texts):
+    """Cache keys of `texts` in order; a cache whose keys.json lists exactly these has rows in corpus order"""
+    return [_content_key(model_name, text) for text in texts]
+
+
+def _matrix_name(keys):
+    """File name of the matrix whose rows follow `keys`: content-addressed, so keys.json commits both"""
+    digest = hashlib.sha1("\n".join(keys).encode('utf-8')).hexdigest()
+    return f"embeddings-{digest}.npy"
+
+
+def _atomic_write(path, write):
+    """Write to a temporary file next to `path` and move it into place"""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class EmbeddingCache:
+    """On-disk cache of corpus embeddings stored as a memory-mappable .npy file.
+
+    Rows are keyed by a content hash of the processed text plus the model name,
+    so only new or changed texts need to go through the encoder on start. The
+    whole cache is discarded when the text normalizer version changes.
+    The matrix file is named after its key list and keys.json names it, so
+    replacing keys.json switches keys and rows together.
+    """
+
+    def __init__(self, cache_dir, model_name, normalizer_version=None):
+        self.model_name = model_name
+        self.normalizer_version = normalizer_version
+        self.cache_dir = os.path.join(cache_dir, re.sub(r'[^\w.-]', '_', model_name))
+        self.keys_path = os.path.join(self.cache_dir, "keys.json")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _load(self):
+        """Return (keys, memory-mapped embeddings) or ([], None) if the cache is unusable"""
+        try:
+            with open(self.keys_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if (meta.get("version") != CACHE_VERSION or meta.get("model_name") != self.model_name
+                    or meta.get("normalizer_version") != self.normalizer_version):
+                logging.info(f"Ignoring stale embedding cache in {self.cache_dir}")
+                return [], None
+            # keys.json only counts if it names the matrix written for exactly these keys
+            if meta.get("embeddings") != _matrix_name(meta["keys"]):
+                logging.warning(f"Embedding cache in {self.cache_dir} does not match its key list, rebuilding")
+                return [], None
+            embeddings = np.load(os.path.join(self.cache_dir, meta["embeddings"]), mmap_mode='r')
+            if len(embeddings) != len(meta["keys"]):
+                logging.warning(f"Embedding cache in {self.cache_dir} is inconsistent, rebuilding")
+                return [], None
+            return meta["keys"], embeddings
+        except (OSError, ValueError, KeyError):
+            return [], None
+
+    def _save(self, keys, embeddings):
+        """Persist the matrix under its content-addressed name, then the key list that points at it.
+
+        Returns the matrix path. Older matrices are removed once keys.json no
+        longer names them; processes that mapped one keep their pages.
+        """
+        name = _matrix_name(keys)
+        path = os.path.join(self.cache_dir, name)
+        _atomic_write(path, lambda f: np.save(f, embeddings))
+        meta = {"version": CACHE_VERSION, "model_name": self.model_name,
+                "normalizer_version": self.normalizer_version, "keys": keys, "embeddings": name}
+        _atomic_write(self.keys_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+        for old_path in glob.glob(os.path.join(self.cache_dir, "embeddings*.npy")):
+            if os.path.basename(old_path) != name:
+                try:
+                    os.remove(old_path)
+                except OSError:  # Still open elsewhere on platforms that forbid removing it
+                    pass
+        return path
+
+    def encode(self, model, texts, batch_size=64):
+        """Return float32 embeddings for `texts`, encoding only rows missing from the cache"""
+        keys = content_keys(self.model_name, texts)
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        cached_keys, cached = self._load()
+
+        # Unchanged corpus: hand back the memory map without touching the encoder
+        if cached is not None and cached_keys == keys:
+            logging.info(f"Loaded {len(keys)} embeddings from cache")
+            return cached
+
+        row_of = {key: row for row, key in enumerate(cached_keys)}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in row_of and key not in missing:
+                missing[key] = text
+
+        new_embeddings = {}
+        if missing:
+            encoded = model.encode(list(missing.values()), batch_size=batch_size,
+                                   convert_to_numpy=True, show_progress_bar=False)
+            new_embeddings = dict(zip(missing.keys(), np.asarray(encoded, dtype=np.float32)))
+
+        dim = cached.shape[1] if cached is not None else next(iter(new_embeddings.values())).shape[0]
+        embeddings = np.empty((len(keys), dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            embeddings[i] = cached[row_of[key]] if key in row_of else new_embeddings[key]
+
+        logging.info(f"Encoded {len(missing)} of {len(keys)} embeddings, "
+                     f"{len(keys) - len(missing)} served from cache")
+        path = self._save(keys, embeddings)
+        # Serve the file we just wrote so every process maps the same pages
+        return np.load(path, mmap_mode='r')
@@ -0,0 +1,200 @@
+import logging
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import brotli  # noqa: F401  urllib3 only decodes "br" when a brotli package is installed
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+# Server-side hiccups worth retrying; anything else is returned to the caller as is
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+# Failures a retry could fix, including a body cut off or garbled while it was streaming
+TRANSIENT_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)
+
+
+class ResponseTooLarge(requests.exceptions.RequestException):
+    """The response body exceeded the fetcher's size cap"""
+
+
+def is_transient_error(exc):
+    """True for failures a retry could have fixed: timeouts, dropped connections, broken bodies, 5xx/429"""
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return True
+    response = getattr(exc, "response", None)
+    return response is not None and response.status_code in TRANSIENT_STATUS
+
+
+class _CountingFile:
+    """Socket file proxy that counts the bytes a response body takes off the wire.
+
+    urllib3's `tell()` misses chunked bodies, so the count is taken underneath it.
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+        self.count = 0
+
+    def _counted(self, data):
+        self.count += len(data)
+        return data
+
+    def read(self, *args):
+        return self._counted(self._fp.read(*args))
+
+    def read1(self, *args):
+        return self._counted(self._fp.read1(*args))
+
+    def readline(self, *args):
+        return self._counted(self._fp.readline(*args))
+
+    def readinto(self, buffer):
+        size = self._fp.readinto(buffer)
+        self.count += size or 0
+        return size
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+
+class HTTPFetcher:
+    """Pooled, compressed GET requests with capped exponential backoff and a body size cap.
+
+    One session is shared by all crawl workers, so the connection pool per host is
+    sized to the crawl concurrency. Timeouts, connection errors and 5xx/429 answers
+    are retried with full jitter; every request's wall time and attempts are recorded.
+    """
+
+    def __init__(self, headers=None, pool_size=8, pool_connections=10, max_retries=3,
+                 backoff_base=0.5, backoff_cap=10.0, timeout=(5, 15), max_bytes=10 * 1024 * 1024):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap  # Longest single wait between attempts, in seconds
+        self.timeout = timeout  # (connect, read) seconds
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(headers or {})
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.bytes = 0  # As transferred, i.e. still compressed
+        self.decoded_bytes = 0
+        self.total_time = 0.0
+
+    def _backoff(self, attempt, response=None):
+        """Full-jitter exponential delay, honouring a numeric Retry-After up to the cap"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _read_body(self, response):
+        """Stream the body, aborting once its decompressed size grows past max_bytes.
+
+        Returns (decompressed size, bytes read off the wire).
+        """
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            response.close()
+            raise ResponseTooLarge(f"{response.url} declares {declared} bytes", response=response)
+        counter = None
+        connection = getattr(response.raw, "_fp", None)  # The http.client response under urllib3's
+        if getattr(connection, "fp", None) is not None:
+            counter = connection.fp = _CountingFile(connection.fp)
+        chunks, size = [], 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_bytes:
+                response.close()
+                raise ResponseTooLarge(f"{response.url} is larger than {self.max_bytes} bytes", response=response)
+            chunks.append(chunk)
+        # Same thing Response.content does internally, so .text and .json() keep working
+        response._content = b"".join(chunks)
+        if counter is not None:
+            return size, counter.count
+        tell = getattr(response.raw, "tell", None)
+        return size, tell() if tell is not None else size
+
+    def get(self, url, headers=None):
+        """GET `url`, retrying transient failures; returns the last response or raises the last error.
+
+        The response carries `fetch_time` (seconds across all attempts), `attempts`
+        and `wire_bytes`, the compressed size of the body as transferred.
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            response, error = None, None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+                if response.status_code not in TRANSIENT_STATUS:
+                    size, wire_size = self._read_body(response)
+                    break
+                response.close()
+            except ResponseTooLarge:
+                self._record(start, attempt, failed=True)
+                raise
+            except TRANSIENT_ERRORS as e:
+                error = e
+
+            if attempt >= self.max_retries:
+                if error is not None:
+                    self._record(start, attempt, failed=True)
+                    raise error
+                # Out of retries on a 5xx: hand it back so the caller's raise_for_status reports it
+                response._content = b""
+                size = wire_size = 0
+                break
+            delay = self._backoff(attempt, response)
+            reason = str(error) if error is not None else f"HTTP {response.status_code}"
+            logging.info(f"Retrying {url} in {delay:.1f}s after {reason} (attempt {attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+            attempt += 1
+
+        response.attempts = attempt + 1
+        response.wire_bytes = wire_size
+        response.fetch_time = self._record(start, attempt, size=size, wire_size=wire_size,
+                                           failed=response.status_code in TRANSIENT_STATUS)
+        logging.debug(f"Fetched {url} in {response.fetch_time:.3f}s "
+                      f"({wire_size} bytes transferred, {size} decoded, {response.attempts} attempts)")
+        return response
+
+    def _record(self, start, retries, size=0, wire_size=0, failed=False):
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self.requests += 1
+            self.retries += retries
+            self.failures += failed
+            self.bytes += wire_size
+            self.decoded_bytes += size
+            self.total_time += elapsed
+        return elapsed
+
+    def stats(self):
+        """Counters for monitoring; bytes are as transferred, avg_time is per request including retries"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "bytes": self.bytes,
+                "decoded_bytes": self.decoded_bytes,
+                "avg_time": self.total_time / self.requests if self.requests else 0.0
+            }
+
+    def close(self):
+        self.session.close()
@@ -1,7 +1,11 @@
+import argparse
 import json
+import logging
 import os
 from pathlib import Path
 import numpy as np
+import corpus_store
+from bm25_index import DEFAULT_BM25_PATH, BM25Index, save_bm25_atomic
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
@@ -10,15 +14,22 @@ def load_cdp_data():
     cdp_data = {}
     data_dir = Path("cdp_data")
     
+    # Corpus shards are iterated lazily, one record at a time
+    for cdp_name in corpus_store.platforms(data_dir):
+        cdp_data[cdp_name] = corpus_store.iter_records(data_dir, cdp_name)
+    
+    # Older crawls wrote one JSON array per platform
     for file_path in data_dir.glob("*_howto.json"):
+        cdp_name = file_path.stem.replace('_howto', '')
+        if cdp_name in cdp_data:
+            continue
         with open(file_path, 'r', encoding='utf-8') as file:
-            cdp_name = file_path.stem.replace('_howto', '')
             cdp_data[cdp_name] = json.load(file)
     
     return cdp_data
 
-# Process and index documents
-def create_document_index(cdp_data):
+def _collect_documents(cdp_data):
+    """Document texts and their sources, in the same order"""
     documents = []
     document_sources = []
     
@@ -32,9 +43,30 @@ def create_document_index(cdp_data):
                 'title': guide['title'],
                 'url': guide['url']
             })
+    return documents, document_sources
+
+# Process and index documents
+def create_document_index(cdp_data):
+    documents, document_sources = _collect_documents(cdp_data)
     
     # Create TF-IDF vectorizer
     vectorizer = TfidfVectorizer(stop_words='english')
     tfidf_matrix = vectorizer.fit_transform(documents)
     
-    return vectorizer, tfidf_matrix, document_sources
\ No newline at end of file
+    return vectorizer, tfidf_matrix, document_sources
+
+def save_document_index(cdp_data, path=DEFAULT_BM25_PATH):
+    """Build the BM25 inverted index over the same documents and persist it for keyword search"""
+    documents, document_sources = _collect_documents(cdp_data)
+    index = BM25Index(documents, document_sources)
+    save_bm25_atomic(index, path)
+    return index
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Build the persisted BM25 keyword index from cdp_data")
+    parser.add_argument("--output", default=DEFAULT_BM25_PATH)
+    args = parser.parse_args()
+
+    index = save_document_index(load_cdp_data(), args.output)
+    logging.info(f"Saved BM25 index over {len(index)} documents ({len(index.vocabulary)} terms) to {args.output}")
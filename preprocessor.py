@@ -1,285 +1,192 @@
+import argparse
+import csv
 import os
 import json
-import pandas as pd
-import re
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer
-import nltk
-
-# Ensure you have the NLTK stopwords downloaded
-nltk.download('stopwords')
-
-# Initialize the stemmer and stop words
-stemmer = PorterStemmer()
-stop_words = set(stopwords.words('english'))
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from corpus_store import iter_records
+from aho_corasick import AhoCorasick
+from text_normalizer import NORMALIZER_VERSION, normalize
 
 def load_json_files(directory):
-    """Load all JSON files from the specified directory."""
-    data = []
-    for filename in os.listdir(directory):
-        if filename.endswith('.json'):
+    """Stream entries from the JSONL corpus shards and any legacy <platform>_howto.json files in the directory."""
+    yield from iter_records(directory)
+    # Only the old per-platform dumps hold entries; crawl_metrics.json and the like do not
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('_howto.json'):
             with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
                 file_data = json.load(f)
-                data.extend(file_data)  # Assuming each file contains a list of entries
-    return data
+                yield from file_data  # Assuming each file contains a list of entries
 
-def generate_qa_pairs(scraped_data):
-    """Generate question-answer pairs from the scraped data."""
-    qa_pairs = []
+# (field, substring, question, answer): a rule fires when the case-sensitive
+# substring occurs in the entry's title or content
+QA_RULES = [
+    ("content", "Vault", "What is Vault in Lytics?",
+     "Vault is a feature in Lytics that helps manage and secure user identities."),
+    ("content", "Identity Resolution", "What is Identity Resolution in Lytics?",
+     "Identity Resolution is a key concept in Lytics that helps unify customer identities across different data sources."),
+    ("content", "Cloud Connect", "What is Cloud Connect in Lytics?",
+     "Cloud Connect allows you to connect your data warehouses to Lytics for better data management."),
+    ("title", "mParticle", "What is mParticle?",
+     "mParticle is a customer data platform (CDP) that simplifies how you collect and connect your user data to hundreds of vendors."),
+    ("content", "data quality", "How does mParticle ensure data quality?",
+     "mParticle ensures data quality by providing validation and monitoring features."),
+    ("title", "Segment", "What is Segment?",
+     "Segment is a customer data platform that helps you collect, manage, and integrate your customer data with hundreds of tools."),
+    ("title", "Zeotap", "What is Zeotap CDP?",
+     "Zeotap CDP is a customer data platform that helps businesses collect, unify, and activate customer data across multiple platforms."),
+    ("content", "audiences", "How do I activate audiences in Lytics?",
+     "You can activate audiences by leveraging user profiles and using the Audiences feature."),
+    ("content", "integration", "How do I integrate data sources in Zeotap?",
+     "You can integrate data sources in Zeotap using the Integration Options available in the platform."),
+    ("content", "personalization", "How do I personalize experiences using Segment?",
+     "You can build audiences and journeys from real-time customer data to personalize experiences on every channel."),
+    ("content", "data pipeline", "What is the Data Pipeline in Lytics?",
+     "The Data Pipeline in Lytics is used for managing and processing customer data efficiently."),
+    ("content", "user profiles", "How do I manage user profiles in Lytics?",
+     "User  profiles can be managed through the User Profiles section, where you can view and edit user data."),
+    ("content", "metrics", "How do I monitor metrics in Lytics?",
+     "You can monitor metrics and alerts through the Monitoring section in Lytics."),
+    ("content", "SDKs", "What SDKs are available for Lytics?",
+     "Lytics provides SDKs for Web, Mobile, and Chrome Extension integrations."),
+    ("content", "identity", "What is IDSync in mParticle?",
+     "IDSync is a feature that helps manage user identities across different platforms."),
+    ("content", "events", "What is the Events API in mParticle?",
+     "The Events API allows you to send events directly to mParticle for processing."),
+    ("content", "privacy", "How does mParticle ensure user privacy?",
+     "mParticle ensures compliance with GDPR, CCPA, and your privacy policies through its User Privacy features."),
+    ("content", "data collection", "How can Segment help with data collection?",
+     "Segment simplifies data collection and integrates the tools you need for analytics, growth, and marketing."),
+    ("content", "data integrity", "How do I protect data integrity in Segment?",
+     "Segment prevents data quality issues with a tracking schema and enforcement with Protocols."),
+    ("content", "Segment Spec", "What is the Segment Spec?",
+     "The Segment Spec helps you identify, capture, and format meaningful data for use with Segment libraries and APIs."),
+    ("content", "unify", "How do I unify customer data in Zeotap?",
+     "You can unify customer data using the Catalogue, Calculated Attributes, and ID Strategy features."),
+    ("content", "audiences", "How do I create audiences in Zeotap?",
+     "You can create audiences in Zeotap to segment and activate your customer data."),
+    ("content", "dashboard", "What is the Dashboard in Zeotap?",
+     "The Dashboard in Zeotap allows you to analyze your platform usage and explore consumption metrics."),
+    ("content", "compliance", "How does Zeotap ensure compliance with GDPR?",
+     "Zeotap ensures compliance with GDPR by implementing features like Consent management and Data Lifecycle controls."),
+    ("content", "target", "What is the Target feature in Zeotap?",
+     "The Target feature in Zeotap allows you to create and activate deterministic third-party audiences."),
+    ("content", "admin", "What is the Admin module in Zeotap?",
+     "The Admin module in Zeotap allows you to create organizations and add users with specific roles and access."),
+    ("content", "customer 360", "What is the Customer 360 feature in Zeotap?",
+     "The Customer 360 feature in Zeotap provides a comprehensive view of customer interactions and data across platforms."),
+    ("content", "journeys", "How do I create custom journeys in Zeotap?",
+     "You can create custom journeys in Zeotap using the ID feature to provide optimal actions based on user behavior."),
+    ("content", "data lifecycle", "What is the Data Lifecycle feature in Zeotap?",
+     "The Data Lifecycle feature in Zeotap helps manage customer data in compliance with regulatory frameworks."),
+    ("content", "integration options", "What are the Integration Options in Zeotap?",
+     "The Integration Options in Zeotap allow you to connect various data sources and activate your data across platforms.")
+]
+
+
+def compile_qa_rules(rules):
+    """Compile the rule table into one matcher per field plus pattern -> rule indices"""
+    compiled = {}
+    for field in ("title", "content"):
+        rule_ids = {}
+        for rule_id, (rule_field, pattern, _, _) in enumerate(rules):
+            if rule_field == field:
+                rule_ids.setdefault(pattern, []).append(rule_id)
+        patterns = list(rule_ids)
+        compiled[field] = (AhoCorasick(patterns), [rule_ids[pattern] for pattern in patterns])
+    return compiled
+
+_compiled_rules = compile_qa_rules(QA_RULES)
+
+def _qa_sources(scraped_data):
+    """(question, answer) -> {source URL: None} for every rule the entries fire, in first-seen order"""
+    sources = {}
 
     for entry in scraped_data:
         if isinstance(entry, dict):  # Ensure entry is a dictionary
-            title = entry.get('title', 'No Title')
-            content = entry.get('content', '')
-            
-            # Generate questions based on the content
-            if "Vault" in content:
-                qa_pairs.append({
-                    "question": "What is Vault in Lytics?",
-                    "answer": "Vault is a feature in Lytics that helps manage and secure user identities."
-                })
-            
-            if "Identity Resolution" in content:
-                qa_pairs.append({
-                    "question": "What is Identity Resolution in Lytics?",
-                    "answer": "Identity Resolution is a key concept in Lytics that helps unify customer identities across different data sources."
-                })
-            
-            if "Cloud Connect" in content:
-                qa_pairs.append({
-                    "question": "What is Cloud Connect in Lytics?",
-                    "answer": "Cloud Connect allows you to connect your data warehouses to Lytics for better data management."
-                })
-            
-            if "mParticle" in title:
-                qa_pairs.append({
-                    "question": "What is mParticle?",
-                    "answer": "mParticle is a customer data platform (CDP) that simplifies how you collect and connect your user data to hundreds of vendors."
-                })
-            
-            if "data quality" in content:
-                qa_pairs.append({
-                    "question": "How does mParticle ensure data quality?",
-                    "answer": "mParticle ensures data quality by providing validation and monitoring features."
-                })
-            
-            if "Segment" in title:
-                qa_pairs.append({
-                    "question": "What is Segment?",
-                    "answer": "Segment is a customer data platform that helps you collect, manage, and integrate your customer data with hundreds of tools."
-                })
-            
-            if "Zeotap" in title:
-                qa_pairs.append({
-                    "question": "What is Zeotap CDP?",
-                    "answer": "Zeotap CDP is a customer data platform that helps businesses collect, unify, and activate customer data across multiple platforms."
-                })
-            
-            # Additional questions based on keywords in the content
-            if "audiences" in content:
-                qa_pairs.append({
-                    "question": "How do I activate audiences in Lytics?",
-                    "answer": "You can activate audiences by leveraging user profiles and using the Audiences feature."
-                })
-            
-            if "integration" in content:
-                qa_pairs.append({
-                    "question": "How do I integrate data sources in Zeotap?",
-                    "answer": "You can integrate data sources in Zeotap using the Integration Options available in the platform."
-                })
-            
-            if "personalization" in content:
-                qa_pairs.append({
-                    "question": "How do I personalize experiences using Segment?",
-                    "answer": "You can build audiences and journeys from real-time customer data to personalize experiences on every channel."
-                })
-            
-            
-            
-            if "data pipeline" in content:
-                qa_pairs.append({
-                    "question": "What is the Data Pipeline in Lytics?",
-                    "answer": "The Data Pipeline in Lytics is used for managing and processing customer data efficiently."
-                })
-            
-            if "user profiles" in content:
-                qa_pairs.append({
-                    "question": "How do I manage user profiles in Lytics?",
-                    "answer": "User  profiles can be managed through the User Profiles section, where you can view and edit user data."
-                })
-            
-            if "metrics" in content:
-                qa_pairs.append({
-                    "question": "How do I monitor metrics in Lytics?",
-                    "answer": "You can monitor metrics and alerts through the Monitoring section in Lytics."
-                })
-            
-            if "SDKs" in content:
-                qa_pairs.append({
-                    "question": "What SDKs are available for Lytics?",
-                    "answer": "Lytics provides SDKs for Web, Mobile, and Chrome Extension integrations."
-                })
-            
-            # mParticle Questions
-            if "mParticle" in title:
-                qa_pairs.append({
-                    "question": "What is mParticle?",
-                    "answer": "mParticle is a customer data platform (CDP) that simplifies how you collect and connect your user data to hundreds of vendors."
-                })
-            
-            if "data quality" in content:
-                qa_pairs.append({
-                    "question": "How does mParticle ensure data quality?",
-                    "answer": "mParticle ensures data quality by providing validation and monitoring features."
-                })
-            
-            if "identity" in content:
-                qa_pairs.append({
-                    "question": "What is IDSync in mParticle?",
-                    "answer": "IDSync is a feature that helps manage user identities across different platforms."
-                })
-            
-            if "events" in content:
-                qa_pairs.append({
-                    "question": "What is the Events API in mParticle?",
-                    "answer": "The Events API allows you to send events directly to mParticle for processing."
-                })
-            
-            if "privacy" in content:
-                qa_pairs.append({
-                    "question": "How does mParticle ensure user privacy?",
-                    "answer": "mParticle ensures compliance with GDPR, CCPA, and your privacy policies through its User Privacy features."
-                })
-            
-            # Segment Questions
-            if "Segment" in title:
-                qa_pairs.append({
-                    "question": "What is Segment?",
-                    "answer": "Segment is a customer data platform that helps you collect, manage, and integrate your customer data with hundreds of tools."
-                })
-            
-            if "data collection" in content:
-                qa_pairs.append({
-                    "question": "How can Segment help with data collection?",
-                    "answer": "Segment simplifies data collection and integrates the tools you need for analytics, growth, and marketing."
-                })
-            
-            if "data integrity" in content:
-                qa_pairs.append({
-                    "question": "How do I protect data integrity in Segment?",
-                    "answer": "Segment prevents data quality issues with a tracking schema and enforcement with Protocols."
-                })
-            
-            if "personalization" in content:
-                qa_pairs.append({
-                    "question": "How do I personalize experiences using Segment?",
-                    "answer": "You can build audiences and journeys from real-time customer data to personalize experiences on every channel."
-                })
-            
-            if "Segment Spec" in content:
-                qa_pairs.append({
-                    "question": "What is the Segment Spec?",
-                    "answer": "The Segment Spec helps you identify, capture, and format meaningful data for use with Segment libraries and APIs."
-                })
-            
-            # Zeotap Questions
-            if "Zeotap" in title:
-                qa_pairs.append({
-                    "question": "What is Zeotap CDP?",
-                    "answer": "Zeotap CDP is a customer data platform that helps businesses collect, unify, and activate customer data across multiple platforms."
-                })
-            
-            if "unify" in content:
-                qa_pairs.append({
-                    "question": "How do I unify customer data in Zeotap?",
-                    "answer": "You can unify customer data using the Catalogue, Calculated Attributes, and ID Strategy features."
-                })
-            
-            if "audiences" in content:
-                qa_pairs.append({
-                    "question": "How do I create audiences in Zeotap?",
-                    "answer": "You can create audiences in Zeotap to segment and activate your customer data."
-                })
-            
-            if "dashboard" in content:
-                qa_pairs.append({
-                    "question": "What is the Dashboard in Zeotap?",
-                    "answer": "The Dashboard in Zeotap allows you to analyze your platform usage and explore consumption metrics."
-                })
-            
-            if "compliance" in content:
-                qa_pairs.append({
-                    "question": "How does Zeotap ensure compliance with GDPR?",
-                    "answer": "Zeotap ensures compliance with GDPR by implementing features like Consent management and Data Lifecycle controls."
-                })
-            
-            if "target" in content:
-                qa_pairs.append({
-                    "question": "What is the Target feature in Zeotap?",
-                    "answer": "The Target feature in Zeotap allows you to create and activate deterministic third-party audiences."
-                })
-            
-            if "admin" in content:
-                qa_pairs.append({
-                    "question": "What is the Admin module in Zeotap?",
-                    "answer":                 "The Admin module in Zeotap allows you to create organizations and add users with specific roles and access."
-            })
-            
-            if "customer 360" in content:
-                qa_pairs.append({
-                    "question": "What is the Customer 360 feature in Zeotap?",
-                    "answer": "The Customer 360 feature in Zeotap provides a comprehensive view of customer interactions and data across platforms."
-                })
-            
-            if "journeys" in content:
-                qa_pairs.append({
-                    "question": "How do I create custom journeys in Zeotap?",
-                    "answer": "You can create custom journeys in Zeotap using the ID feature to provide optimal actions based on user behavior."
-                })
-            
-            if "data lifecycle" in content:
-                qa_pairs.append({
-                    "question": "What is the Data Lifecycle feature in Zeotap?",
-                    "answer": "The Data Lifecycle feature in Zeotap helps manage customer data in compliance with regulatory frameworks."
-                })
-            
-            if "integration options" in content:
-                qa_pairs.append({
-                    "question": "What are the Integration Options in Zeotap?",
-                    "answer": "The Integration Options in Zeotap allow you to connect various data sources and activate your data across platforms."
-                })
+            fired = set()
+            # Each field is scanned once, whatever the number of rules
+            for field, default in (("title", "No Title"), ("content", "")):
+                matcher, pattern_rules = _compiled_rules[field]
+                for pattern_id in matcher.matches(entry.get(field) or default):
+                    fired.update(pattern_rules[pattern_id])
+            
+            for rule_id in sorted(fired):
+                _, _, question, answer = QA_RULES[rule_id]
+                urls = sources.setdefault((question, answer), {})
+                if entry.get('url'):
+                    urls[entry['url']] = None
 
-    return qa_pairs
+    return sources
+
+def generate_qa_pairs(scraped_data):
+    """Generate unique question-answer pairs from the scraped data, with the URLs that triggered each."""
+    return [{"question": question, "answer": answer, "source_urls": list(urls)}
+            for (question, answer), urls in _qa_sources(scraped_data).items()]
             
 def preprocess_text(text):
-    """Preprocess the text by lowering case, removing punctuation, and stemming."""
-    # Lowercase
-    text = text.lower()
-    # Remove punctuation
-    text = re.sub(r'[^\w\s]', '', text)
-    # Tokenization
-    tokens = text.split()
-    # Remove stop words and stem
-    tokens = [stemmer.stem(word) for word in tokens if word not in stop_words]
-    return ' '.join(tokens)
+    """Normalize text exactly the way the retriever normalizes queries."""
+    return normalize(text)
 
-# Load data from the specified directory
-scraped_data = load_json_files(r'C:\Users\Ananya Tiwari\cdp-chatbot\cdp_data')  # Use raw string or forward slashes
+def _normalize_pairs(qa_pairs):
+    """CSV rows for a chunk of QA pairs, with processed question and answer"""
+    return [{
+        "question": pair["question"],
+        "answer": pair["answer"],
+        "source_urls": json.dumps(pair["source_urls"]),
+        "processed_question": preprocess_text(pair["question"]),
+        "processed_answer": preprocess_text(pair["answer"]),
+        "normalizer_version": NORMALIZER_VERSION
+    } for pair in qa_pairs]
 
-# Generate QA pairs from the scraped data
-qa_pairs = generate_qa_pairs(scraped_data)
+def _chunks(items, size):
+    """Split any iterable into lists of at most `size` items without materializing it"""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
 
-# Create a DataFrame from the QA pairs
-df_qa = pd.DataFrame(qa_pairs)
+def _ordered_map(executor, fn, chunks, max_pending):
+    """executor.map that keeps at most `max_pending` chunks in flight, so streams stay streams"""
+    pending = []
+    for chunk in chunks:
+        pending.append(executor.submit(fn, chunk))
+        if len(pending) >= max_pending:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
 
-# Preprocess questions and answers
-df_qa['processed_question'] = df_qa['question'].apply(preprocess_text)
-df_qa['processed_answer'] = df_qa['answer'].apply(preprocess_text)
+def preprocess_corpus(data_dir, output_path='qa_pairs.csv', workers=None, chunk_size=500):
+    """Stream the corpus through a process pool and write the processed QA pairs as they are ready"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Rule matching runs per chunk in the workers; partial results merge in chunk order
+        sources = {}
+        for partial in _ordered_map(executor, _qa_sources, _chunks(load_json_files(data_dir), chunk_size), workers * 2):
+            for pair, urls in partial.items():
+                sources.setdefault(pair, {}).update(urls)
+        qa_pairs = [{"question": question, "answer": answer, "source_urls": list(urls)}
+                    for (question, answer), urls in sources.items()]
 
-# Display the processed DataFrame
-print(df_qa[['question', 'processed_question', 'answer', 'processed_answer']])
+        # Normalization is spread over the same pool; each chunk is written out as soon as it is done
+        fieldnames = ["question", "answer", "source_urls", "processed_question", "processed_answer", "normalizer_version"]
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for rows in _ordered_map(executor, _normalize_pairs, _chunks(qa_pairs, chunk_size), workers * 2):
+                writer.writerows(rows)
+                f.flush()
+    return len(qa_pairs)
 
-# Save the DataFrame to a CSV file
-df_qa.to_csv('qa_pairs.csv', index=False)  # Save without the index column
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate and preprocess QA pairs from scraped CDP docs")
+    parser.add_argument("data_dir", nargs="?", default="cdp_data", help="Directory the scraper wrote its corpus to")
+    parser.add_argument("--output", default="qa_pairs.csv")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
 
-print("QA pairs saved to qa_pairs.csv")
\ No newline at end of file
+    count = preprocess_corpus(args.data_dir, args.output, workers=args.workers, chunk_size=args.chunk_size)
+    print(f"{count} QA pairs saved to {args.output}")
@@ -1,9 +1,9 @@
 # responder.py
-import pandas as pd
-from retriever import Retriever  # Ensure you have the correct import
+from retriever import get_retriever  # Ensure you have the correct import
 
-# Load your QA pairs DataFrame
-qa_pairs_df = pd.read_csv(r'C:\Users\Ananya Tiwari\cdp-chatbot\qa_pairs.csv')  # Ensure this path is correct
-
-# Initialize the retriever
-retriever = Retriever(qa_pairs_df)
+# The retriever (QA pairs, model and embeddings) is shared with the rest of the
+# process and only built the first time it is needed
+def __getattr__(name):
+    if name == 'retriever':
+        return get_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,55 +1,295 @@
-import pandas as pd
-from sentence_transformers import SentenceTransformer, util
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+import numpy as np
+from embedding_cache import EmbeddingCache
+from vector_index import build_index, build_params, load_index, memory_report, save_index_atomic
+from query_cache import LRUCache
+from text_normalizer import NORMALIZER_VERSION, normalize
 
-# Ensure you have the necessary NLTK resources
-nltk.download('stopwords')
-nltk.download('wordnet')
+# Heavy dependencies (pandas, nltk, sentence_transformers) are imported on first
+# use so that importing this module stays cheap and never touches the network.
 
-stop_words = set(stopwords.words('english'))
-lemmatizer = WordNetLemmatizer()
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+DEFAULT_QA_PAIRS_PATH = os.environ.get(
+    'QA_PAIRS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'qa_pairs.csv'))
+# Documentation passages written by chunker.py; searched alongside the QA pairs when present
+DEFAULT_PASSAGES_PATH = os.environ.get(
+    'PASSAGES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'passages.csv'))
+DEFAULT_EMBEDDING_CACHE_DIR = os.environ.get(
+    'EMBEDDING_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'embedding_cache'))
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, concurrent first starts may each build
+    fcntl = None
+
+_init_lock = threading.RLock()
+_models = {}
+_retriever = None
 
 def preprocess_text(text):
+    """Queries go through the same normalizer as the indexed questions"""
+    return normalize(text)
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive inter-process lock held while shared artifacts are built"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def get_model(model_name=DEFAULT_MODEL_NAME):
+    """Return the process-wide SentenceTransformer for `model_name`, loading it on first use"""
+    with _init_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
+
+def load_qa_pairs(data_path=None):
+    """Read the QA pairs CSV; defaults to $QA_PAIRS_PATH or qa_pairs.csv next to this file.
+
+    Processed columns written by a different normalizer version are recomputed.
+    """
+    import pandas as pd
+    qa_data = pd.read_csv(data_path or DEFAULT_QA_PAIRS_PATH)
+    if 'normalizer_version' not in qa_data or (qa_data['normalizer_version'] != NORMALIZER_VERSION).any():
+        qa_data['processed_question'] = qa_data['question'].map(normalize)
+        qa_data['processed_answer'] = qa_data['answer'].map(normalize)
+        qa_data['normalizer_version'] = NORMALIZER_VERSION
+    return qa_data
+
+def load_corpus(data_path=None, passages_path=None):
+    """QA pairs plus, if the passages file exists, chunked documentation passages"""
+    qa_data = load_qa_pairs(data_path)
+    passages_path = passages_path or DEFAULT_PASSAGES_PATH
+    if os.path.exists(passages_path):
+        import pandas as pd
+        from chunker import load_passages
+        qa_data = pd.concat([qa_data, load_passages(passages_path)], ignore_index=True)
+    return qa_data
+
+def get_retriever(data_path=None, passages_path=None, **kwargs):
+    """Return the process-wide Retriever, building it on first call"""
+    global _retriever
+    with _init_lock:
+        if _retriever is None:
+            started = time.perf_counter()
+            qa_data = load_corpus(data_path, passages_path)
+            load_time = time.perf_counter() - started
+            kwargs.setdefault('shared_dir', os.environ.get('RETRIEVER_SHARED_DIR'))
+            _retriever = Retriever(qa_data, **kwargs)
+            _retriever.startup_timings = {"load_corpus": load_time, **_retriever.startup_timings}
+        return _retriever
+
+NO_ANSWER = "I'm sorry, I couldn't find an answer to your question."
+PLATFORMS = ('segment', 'mparticle', 'lytics', 'zeotap')
+
+# Representative questions used to warm up tokenization and model kernels before serving
+WARMUP_QUERIES = [
+    "What is Segment?",
+    "How do I create audiences in Zeotap?",
+    "How does mParticle ensure data quality?",
+    "How do I set up a new source in Lytics and integrate it with my data warehouse?"
+]
+
+def corpus_fingerprint(qa_data, model_name):
+    """Identify a corpus/model/normalizer combination so cached results can be invalidated when any changes"""
+    import pandas as pd
+    row_hashes = pd.util.hash_pandas_object(qa_data[['processed_question', 'answer']], index=False)
+    key = f"{model_name}\0{NORMALIZER_VERSION}".encode('utf-8')
+    return hashlib.sha1(key + row_hashes.values.tobytes()).hexdigest()
+
+def infer_platform(text):
+    """Best-effort platform for QA pairs without a platform column: the first one mentioned"""
     text = text.lower()
-    text = re.sub(r'[^\w\s]', '', text)
-    tokens = text.split()
-    tokens = [lemmatizer.lemmatize(word) for word in tokens if word not in stop_words]
-    return ' '.join(tokens)
+    for platform in PLATFORMS:
+        if platform in text:
+            return platform
+    return None
 
 class Retriever:
-    def __init__(self, qa_data):
+    def __init__(self, qa_data, model_name=DEFAULT_MODEL_NAME, cache_dir=DEFAULT_EMBEDDING_CACHE_DIR,
+                 index_kind='brute', index_path=None, min_similarity=0.3,
+                 result_cache=None, cache_size=1024, cache_ttl=3600,
+                 embedding_cache_size=4096, shared_dir=None, **index_params):
         self.qa_data = qa_data
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')  # Load a pre-trained model
-        self.question_embeddings = self.model.encode(self.qa_data['processed_question'].tolist(), convert_to_tensor=True)
+        self.min_similarity = min_similarity  # Candidates scoring below this are not served
+        # Results are keyed on the preprocessed query; the fingerprint ties them to this corpus and model
+        self.result_cache = result_cache if result_cache is not None else LRUCache(cache_size, cache_ttl)
+        self.fingerprint = corpus_fingerprint(qa_data, model_name)
+        # Query embeddings only depend on the model, so they survive corpus and threshold changes
+        self.model_name = model_name
+        self.query_embedding_cache = LRUCache(embedding_cache_size)
+        self.startup_timings = {}  # Seconds spent in each startup phase
+        with self._timed("load_model"):
+            self.model = get_model(model_name)  # Shared with every other Retriever using this model
+        questions = self.qa_data['processed_question'].tolist()
+        # In shared mode the first worker builds embeddings and index under a lock and every
+        # worker (including that one) memory-maps the same read-only files
+        self.shared_dir = shared_dir
+        if shared_dir:
+            cache_dir = os.path.join(shared_dir, 'embeddings')
+            index_path = os.path.join(shared_dir, 'index')
+        with _file_lock(os.path.join(shared_dir, '.lock')) if shared_dir else nullcontext():
+            with self._timed("embed_corpus"):
+                if cache_dir:
+                    # Only new or changed questions are encoded, the rest come from disk
+                    self.question_embeddings = EmbeddingCache(cache_dir, model_name, NORMALIZER_VERSION).encode(self.model, questions)
+                else:
+                    self.question_embeddings = self.model.encode(questions, convert_to_numpy=True)
+            with self._timed("build_index"):
+                self.index = self._load_or_build_index(index_kind, index_path, index_params)
+        # Quantized indexes re-rank their top candidates against the full-precision rows
+        self.index.rescore_vectors = self.question_embeddings
+
+    @contextmanager
+    def _timed(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[phase] = time.perf_counter() - started
+
+    def warm_up(self, queries=WARMUP_QUERIES, rounds=2):
+        """Run dummy queries end to end so the first real request doesn't pay for lazy initialization.
+
+        Bypasses the result and embedding caches so warm-up traffic doesn't show up in their stats.
+        """
+        with self._timed("warm_up"):
+            for _ in range(rounds):
+                processed = [preprocess_text(query) for query in queries]
+                if len(self.index) > 0:
+                    scores, ids = self.index.search(self.model.encode(processed, convert_to_numpy=True), top_k=1)
+                    for row_scores, row_ids in zip(scores, ids):
+                        self._candidates(row_scores, row_ids)
+
+    def _load_or_build_index(self, index_kind, index_path, index_params):
+        """Use an index built offline when it was built for this corpus, model and index settings, otherwise build one"""
+        params = build_params(index_kind, **index_params)
+        if index_path and os.path.exists(os.path.join(index_path, "index.json")):
+            index = load_index(index_path)
+            if index.metadata.get("corpus_fingerprint") != self.fingerprint:
+                logging.warning(f"Index at {index_path} was not built for the current corpus, model and normalizer; rebuilding")
+            elif index.store.codes.shape[1:] != self.question_embeddings.shape[1:]:
+                logging.warning(f"Index at {index_path} has {index.store.codes.shape[1]}-dimensional rows, "
+                                f"the model produces {self.question_embeddings.shape[1]}; rebuilding")
+            elif index.metadata.get("kind") != index_kind or index.metadata.get("build_params") != params:
+                logging.warning(f"Index at {index_path} was built as {index.metadata.get('kind')} with "
+                                f"{index.metadata.get('build_params')}, not {index_kind} with {params}; rebuilding")
+            else:
+                return index
+        index = build_index(self.question_embeddings, index_kind, **index_params)
+        if self.shared_dir:
+            # Publish it for the other workers and map it back so this process shares the pages too
+            save_index_atomic(index, index_path, build_params=params, corpus_fingerprint=self.fingerprint,
+                              normalizer_version=NORMALIZER_VERSION)
+            index = load_index(index_path)
+        return index
+
+    def _candidates(self, scores, ids):
+        """Turn one row of index results into scored answer candidates above the threshold"""
+        candidates = []
+        for score, row_id in zip(scores, ids):
+            if row_id < 0 or row_id >= len(self.qa_data) or score < self.min_similarity:
+                continue
+            row = self.qa_data.iloc[row_id]
+            # QA pairs have no platform or url column; passages carry both
+            platform = row.get('platform')
+            candidate = {
+                "answer": row['answer'],
+                "question": row['question'],
+                "score": float(score),
+                "row_id": int(row_id),
+                "platform": platform if isinstance(platform, str) and platform else infer_platform(row['question'])
+            }
+            if isinstance(row.get('url'), str) and row['url']:
+                candidate["url"] = row['url']
+            candidates.append(candidate)
+        return candidates
+
+    def _search_processed(self, processed_queries, top_k, batch_size=64):
+        """Candidates for already-preprocessed queries, served from the result cache when possible"""
+        self.result_cache.validate(self.fingerprint)
+        results = [None] * len(processed_queries)
+        pending = {}
+        for i, query in enumerate(processed_queries):
+            cached = self.result_cache.get((query, top_k, self.min_similarity))
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(query, []).append(i)
+
+        if pending and len(self.index) > 0:
+            queries = list(pending)
+            query_embeddings = self._encode_queries(queries, batch_size)
+            scores, ids = self.index.search(query_embeddings, top_k=top_k)
+            for query, row_scores, row_ids in zip(queries, scores, ids):
+                candidates = self._candidates(row_scores, row_ids)
+                self.result_cache.put((query, top_k, self.min_similarity), candidates)
+                for i in pending[query]:
+                    results[i] = candidates
+
+        # Hand out copies so callers can't mutate cached entries
+        return [[dict(c) for c in candidates or []] for candidates in results]
+
+    def _encode_queries(self, processed_queries, batch_size=64):
+        """Embed preprocessed queries, running the model only for ones not seen before"""
+        self.query_embedding_cache.validate(self.model_name)
+        embeddings = [self.query_embedding_cache.get(query) for query in processed_queries]
+        missing = [query for query, embedding in zip(processed_queries, embeddings) if embedding is None]
+        if missing:
+            encoded = dict(zip(missing, self.model.encode(missing, batch_size=batch_size, convert_to_numpy=True)))
+            for query, embedding in encoded.items():
+                self.query_embedding_cache.put(query, embedding)
+            embeddings = [encoded[query] if embedding is None else embedding
+                          for query, embedding in zip(processed_queries, embeddings)]
+        return np.stack(embeddings)
+
+    def search(self, user_query, top_k=5):
+        """Return up to `top_k` answer candidates with score, row id and platform, best first"""
+        return self._search_processed([preprocess_text(user_query)], top_k)[0]
 
     def retrieve(self, user_query):
         print("Retrieve method called")
-        user_query_processed = preprocess_text(user_query)
+        candidates = self.search(user_query, top_k=1)
     
-        # Encode the user query
-        user_query_embedding = self.model.encode(user_query_processed, convert_to_tensor=True)
+        # Nothing in the corpus is similar enough to trust
+        if not candidates:
+            return NO_ANSWER
     
-        # Compute cosine similarity
-        similarities = util.pytorch_cos_sim(user_query_embedding, self.question_embeddings)
-    
-        # Check if similarities is empty or has invalid values
-        if similarities.numel() == 0:
-            return "I'm sorry, I couldn't find an answer to your question."
-    
-        # Get the index of the most similar question
-        most_similar_index = similarities.argmax().item()  # Ensure this is an integer
-    
-        # Check if the index is valid
-        if most_similar_index < 0 or most_similar_index >= len(self.qa_data):
-            return "I'm sorry, I couldn't find an answer to your question."
-    
-        return self.qa_data.iloc[most_similar_index]['answer']
+        return candidates[0]['answer']
+
+    def retrieve_many(self, user_queries, top_k=1, batch_size=64):
+        """Answer many queries at once: batch-encode them and score with one search call.
+
+        Returns a list with up to `top_k` answer candidates for each query.
+        """
+        if not user_queries:
+            return []
+        processed = [preprocess_text(query) for query in user_queries]
+        return self._search_processed(processed, top_k, batch_size)
+
+    def index_stats(self):
+        """Size of the index and the memory its corpus rows take versus float32"""
+        return {"kind": self.index.kind, "size": len(self.index), **memory_report(self.index)}
 
-# Load your QA pairs DataFrame
-qa_pairs_df = pd.read_csv(r'C:\Users\Ananya Tiwari\cdp-chatbot\qa_pairs.csv')  # Ensure this path is correct
+    def cache_stats(self):
+        return {"results": self.result_cache.stats(),
+                "query_embeddings": self.query_embedding_cache.stats()}
 
-# Initialize the retriever
-retriever = Retriever(qa_pairs_df)
+# Kept for callers that still do `from retriever import retriever`; built lazily on first access
+def __getattr__(name):
+    if name == 'retriever':
+        return get_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
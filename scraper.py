@@ -6,25 +6,43 @@ import json
 import logging
 import redis
 import hashlib
+import threading
 from urllib.parse import urljoin, urlparse
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, InvalidSessionIdException
+from crawl_scheduler import CrawlScheduler, DomainLimiter
+from driver_pool import DriverPool, wait_for_render
+from http_fetcher import HTTPFetcher, ResponseTooLarge, is_transient_error
+from corpus_store import CorpusWriter, iter_records
+from crawl_checkpoint import CrawlCheckpoint
+from dedup import DuplicateFilter, canonicalize_url
+from crawl_metrics import CrawlMetrics
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Catch-all selectors that match on any page, so they can't tell whether the content has rendered
+FALLBACK_SELECTORS = ("#root", "body")
+
 class CDPScraper:
-    def __init__(self, output_dir="scraped_data", use_redis=True, redis_host='localhost', redis_port=6379, redis_db=0, redis_ttl=86400):
+    def __init__(self, output_dir="scraped_data", use_redis=True, redis_host='localhost', redis_port=6379, redis_db=0, redis_ttl=86400,
+                 redis_max_age=30 * 86400,
+                 max_workers=8, per_domain_concurrency=2, per_domain_interval=1.0,
+                 driver_pool_size=3, max_pages_per_driver=50, compress_corpus=True):
         self.output_dir = output_dir
         self.visited_urls = set()
-        self.session = requests.Session()
+        
+        # Crawl concurrency: pages are fetched by a worker pool, politeness is enforced per domain
+        self.max_workers = max_workers
+        self.per_domain_concurrency = per_domain_concurrency
+        self.per_domain_interval = per_domain_interval
+        self.stats_lock = threading.Lock()
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         }
+        # Pooled keep-alive connections sized to the worker count, compressed transfers and cheap retries
+        self.fetcher = HTTPFetcher(headers=self.headers, pool_size=max_workers)
         
         # Redis configuration
         self.use_redis = use_redis
@@ -32,6 +50,8 @@ class CDPScraper:
             try:
                 self.redis_client = redis.Redis(host=redis_host, port=redis_port, db=redis_db)
                 self.redis_ttl = redis_ttl  # Cache TTL in seconds (default: 1 day)
+                # Stale entries are kept this long so they can be revalidated with ETag/Last-Modified
+                self.redis_max_age = max(redis_max_age, redis_ttl)
                 logging.info("Redis cache initialized")
             except redis.ConnectionError:
                 logging.warning("Failed to connect to Redis. Running without cache.")
@@ -39,6 +59,8 @@ class CDPScraper:
         
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
+        # Records are streamed to per-platform JSONL shards as pages finish, html kept on the side
+        self.corpus = CorpusWriter(output_dir, compress=compress_corpus)
         
         # Selenium configuration
         self.chrome_options = Options()
@@ -49,11 +71,17 @@ class CDPScraper:
         self.chrome_options.add_argument("--window-size=1920,1080")  # Larger viewport
         self.chrome_options.add_argument("--disable-gpu")  # Helps avoid crashes
         self.chrome_options.add_argument("--disable-web-security")  # May help with some sites
-        self.init_webdriver()
+        # Headless browsers are leased per page; the pool recycles them instead of periodic resets
+        self.driver_pool = DriverPool(self._create_driver, size=driver_pool_size,
+                                      max_pages_per_driver=max_pages_per_driver)
         
         # Tracking scraping metrics
         self.pages_visited = 0
-        self.driver_resets = 0
+        self.pages_unchanged = 0  # Pages confirmed unchanged by a 304 or an identical content hash
+        # Exact and near-duplicate records are dropped before they reach the corpus
+        self.duplicates = DuplicateFilter()
+        # Per-page phase timings and per-platform counters, exported at the end of a run
+        self.metrics = CrawlMetrics()
         
         # Platform-specific configurations
         self.platform_configs = {
@@ -76,82 +104,118 @@ class CDPScraper:
             }
         }
     
-    def init_webdriver(self):
-        """Initialize or reinitialize the WebDriver"""
-        try:
-            if hasattr(self, 'driver') and self.driver:
-                try:
-                    self.driver.quit()
-                except Exception as e:
-                    logging.warning(f"Error closing existing WebDriver: {str(e)}")
-        except Exception:
-            pass
-            
+    def _create_driver(self):
+        """Start a new headless WebDriver for the pool"""
         try:
-            self.driver = webdriver.Chrome(options=self.chrome_options)
-            self.driver.set_page_load_timeout(30)  # Set page load timeout
+            driver = webdriver.Chrome(options=self.chrome_options)
+            driver.set_page_load_timeout(30)  # Set page load timeout
             logging.info("WebDriver initialized")
+            return driver
         except Exception as e:
             logging.error(f"Error initializing WebDriver: {str(e)}")
             raise
     
-    def reset_driver(self):
-        """Reset WebDriver when issues occur"""
-        self.init_webdriver()
-        self.driver_resets += 1
-        logging.info(f"WebDriver has been reset (total resets: {self.driver_resets})")
-        time.sleep(2)  # Give the driver a moment after reset
+    @property
+    def driver_resets(self):
+        """WebDrivers replaced by the pool because they broke, bloated or hit their page limit"""
+        return self.driver_pool.recycled
+    
+    def close(self):
+        """Shut down the browser pool and the HTTP connection pool"""
+        self.driver_pool.close()
+        self.fetcher.close()
     
     def _get_cache_key(self, url):
-        """Generate a unique cache key for the URL"""
-        return f"cdpscraper:{hashlib.md5(url.encode()).hexdigest()}"
+        """Generate a unique cache key for the URL; variants of one page share it"""
+        return f"cdpscraper:{hashlib.md5(canonicalize_url(url).encode()).hexdigest()}"
+    
+    def _get_links_key(self, url):
+        """Cache key of the page's outlinks, i.e. its adjacency list in the crawl graph"""
+        return f"cdpscraper:links:{hashlib.md5(canonicalize_url(url).encode()).hexdigest()}"
     
     def _get_from_cache(self, url):
-        """Retrieve data from Redis cache if available"""
+        """Retrieve the cache entry (records, outlinks and validators) for a URL if available.
+        
+        Entries whose outlinks were never cached carry no "links" key; they can't
+        expand the crawl, so they are never served without re-parsing the page.
+        """
         if not self.use_redis:
             return None
         
         try:
-            cache_key = self._get_cache_key(url)
-            cached_data = self.redis_client.get(cache_key)
+            cached_data, cached_links = self.redis_client.mget(self._get_cache_key(url), self._get_links_key(url))
             
             if cached_data:
                 logging.info(f"Cache hit for {url}")
-                return json.loads(cached_data)
+                entry = json.loads(cached_data)
+                if isinstance(entry, list):
+                    # Entries written before validators were stored: fresh for as long as the key lives
+                    entry = {"records": entry, "fetched_at": time.time()}
+                if cached_links is not None:
+                    entry["links"] = json.loads(cached_links)
+                return entry
         except Exception as e:
             logging.warning(f"Error retrieving from cache: {str(e)}")
         
         return None
     
-    def _save_to_cache(self, url, data):
-        """Save data to Redis cache"""
-        if not self.use_redis or not data:
+    def _save_to_cache(self, url, entry):
+        """Save a page's records, outlinks and HTTP validators to Redis cache"""
+        if not self.use_redis:
+            return
+        if not any(entry.get(k) for k in ("records", "links", "etag", "last_modified", "content_hash")):
             return
         
         try:
-            cache_key = self._get_cache_key(url)
-            self.redis_client.setex(
-                cache_key,
-                self.redis_ttl,
-                json.dumps(data)
-            )
+            entry = {**entry, "fetched_at": time.time()}
+            links = entry.pop("links", [])
+            # Page and outlinks are written together so the graph never points at a missing page
+            pipe = self.redis_client.pipeline()
+            pipe.setex(self._get_cache_key(url), self.redis_max_age, json.dumps(entry))
+            pipe.setex(self._get_links_key(url), self.redis_max_age, json.dumps(links))
+            pipe.execute()
             logging.info(f"Saved to cache: {url}")
         except Exception as e:
             logging.warning(f"Error saving to cache: {str(e)}")
     
+    def _is_fresh(self, entry):
+        """Entries younger than redis_ttl are served without asking the server"""
+        return "links" in entry and time.time() - entry.get("fetched_at", 0) < self.redis_ttl
+    
+    def _conditional_headers(self, entry):
+        """Request headers, plus If-None-Match / If-Modified-Since when we hold validators"""
+        headers = dict(self.headers)
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def _revalidated(self, url, entry):
+        """The page is unchanged: extend the cache entry and reuse its records and links without parsing"""
+        with self.stats_lock:
+            self.pages_unchanged += 1
+        logging.info(f"Unchanged since last crawl: {url}")
+        self.metrics.count("cache_revalidated")
+        with self.metrics.phase("cache"):
+            self._save_to_cache(url, entry)
+        return entry["records"], entry["links"]
+    
     def _safe_selenium_operation(self, operation, url, *args, max_retries=2, **kwargs):
-        """Safely execute a Selenium operation with retries"""
+        """Safely execute a Selenium operation on a pooled driver with retries"""
         retry_count = 0
         while retry_count <= max_retries:
             try:
-                return operation(*args, **kwargs)
+                with self.driver_pool.lease() as driver:
+                    return operation(driver, *args, **kwargs)
             except (WebDriverException, InvalidSessionIdException) as e:
                 retry_count += 1
                 logging.warning(f"Selenium error (attempt {retry_count}/{max_retries+1}) on {url}: {str(e)}")
                 
                 if retry_count <= max_retries:
-                    logging.info(f"Resetting driver and retrying...")
-                    self.reset_driver()
+                    # A broken session is discarded by the pool, so the retry gets a healthy driver
+                    logging.info(f"Retrying with another driver...")
                     time.sleep(2 * retry_count)  # Exponential backoff
                 else:
                     logging.error(f"Failed after {max_retries+1} attempts: {url}")
@@ -159,172 +223,184 @@ class CDPScraper:
     
     def _scrape_with_selenium(self, url, selectors):
         """Scrape content using Selenium for dynamic pages with better error handling"""
-        def _perform_scrape():
-            self.driver.get(url)
-            WebDriverWait(self.driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "body")))
-            time.sleep(5)  # Wait for React rendering
-            
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+        selectors = selectors if isinstance(selectors, list) else [selectors]
+        
+        def _perform_scrape(driver):
+            with self.metrics.phase("render"):
+                driver.get(url)
+                # Wait for React rendering: a content selector present and the network quiet
+                content_selectors = [selector for selector in selectors if selector not in FALLBACK_SELECTORS]
+                if not wait_for_render(driver, content_selectors, timeout=20):
+                    logging.warning(f"Timed out waiting for {url} to render, using what is there")
+                page_source = driver.page_source
+            # The browser's own transfer isn't visible here, so the rendered DOM is tracked separately
+            self.metrics.count("rendered_chars", len(page_source))
             
-            for selector in selectors if isinstance(selectors, list) else [selectors]:
-                elements = soup.select(selector)
-                if elements:
-                    return elements, soup
+            with self.metrics.phase("parse"):
+                soup = BeautifulSoup(page_source, 'html.parser')
             
-            body = soup.find('body')
-            return [body] if body else [], soup
+            with self.metrics.phase("select"):
+                for selector in selectors:
+                    elements = soup.select(selector)
+                    if elements:
+                        return elements, soup
+                
+                body = soup.find('body')
+                return [body] if body else [], soup
         
         try:
-            elements, soup = self._safe_selenium_operation(_perform_scrape, url)
-            return elements, soup
+            return self._safe_selenium_operation(_perform_scrape, url)
         except Exception as e:
             logging.error(f"Selenium scraping failed for {url}: {str(e)}")
             return [], None
     
-    def _extract_links_selenium(self, url, doc_terms):
-        """Extract links using Selenium with better error handling"""
-        def _perform_link_extraction():
-            self.driver.get(url)
-            WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "body")))
-            time.sleep(3)  # Wait for React to render
-            
-            links = []
-            for a in self.driver.find_elements(By.TAG_NAME, "a"):
-                try:
-                    href = a.get_attribute("href")
-                    if href and any(term in href.lower() for term in doc_terms):
-                        links.append(href)
-                except:
-                    continue
-            return links
-        
-        try:
-            return self._safe_selenium_operation(_perform_link_extraction, url)
-        except Exception as e:
-            logging.error(f"Error extracting links with Selenium: {str(e)}")
-            return []
-    
     def scrape_url(self, url, platform_name=None, max_pages=100, wait_time=1, depth=0):
-        """Scrape content from URL with improved handling for React-based sites and recursion protection"""
-        # Prevent excessive recursion
-        max_depth = 5
-        if depth >= max_depth:
-            logging.info(f"Max depth reached at {url}")
-            return []
-            
-        # Prevent excessive pages
-        if url in self.visited_urls or len(self.visited_urls) >= max_pages:
-            return []
-        
-        self.visited_urls.add(url)
-        self.pages_visited += 1
-        logging.info(f"Scraping: {url} (depth: {depth}, pages visited: {self.pages_visited})")
+        """Crawl documentation starting at `url` and return the scraped records"""
+        scheduler = self._make_scheduler(wait_time)
+        scheduler.max_depth = max(scheduler.max_depth - depth, 1)  # Honour a non-zero starting depth
+        return scheduler.crawl({platform_name: url}, max_pages=max_pages, visited=self.visited_urls)[platform_name]
+    
+    def _make_scheduler(self, wait_time=None):
+        """Crawl engine that runs _scrape_page concurrently with per-domain politeness"""
+        limiter = DomainLimiter(
+            max_concurrency=self.per_domain_concurrency,
+            min_interval=self.per_domain_interval if wait_time is None else wait_time
+        )
+        return CrawlScheduler(self._ingest_page, max_workers=self.max_workers, limiter=limiter,
+                              max_depth=5, max_links_per_page=10, canonicalize=canonicalize_url,
+                              metrics=self.metrics)
+    
+    def _ingest_page(self, url, platform_name, depth):
+        """Scrape a page and drop records whose content was already seen during this crawl"""
+        records, links = self._scrape_page(url, platform_name, depth)
+        unique = [record for record in records if not self.duplicates.is_duplicate(record["content"])]
+        self.metrics.count("records", len(unique))
+        self.metrics.count("duplicates", len(records) - len(unique))
+        return unique, links
+    
+    def _scrape_page(self, url, platform_name, depth):
+        """Scrape a single page with improved handling for React-based sites.
         
-        # Check cache first
-        cached_data = self._get_from_cache(url)
-        if cached_data:
-            return cached_data
+        Returns (records, links) where links are same-domain documentation URLs to crawl next.
+        """
+        with self.stats_lock:
+            self.pages_visited += 1
+            pages_visited = self.pages_visited
+        logging.info(f"Scraping: {url} (depth: {depth}, pages visited: {pages_visited})")
         
-        # Auto-reset driver after certain number of pages to prevent memory issues
-        if self.pages_visited % 20 == 0:
-            logging.info("Performing routine WebDriver reset")
-            self.reset_driver()
+        # Check cache first; fresh entries feed their cached outlinks to the frontier
+        # without any network or browser work
+        with self.metrics.phase("cache"):
+            cached = self._get_from_cache(url)
+        if cached and self._is_fresh(cached):
+            self.metrics.count("cache_hits")
+            return cached["records"], cached["links"]
+        if self.use_redis:
+            self.metrics.count("cache_stale" if cached else "cache_misses")
+        reusable = cached is not None and "links" in cached
         
         try:
             content_elements = []
             soup = None
+            validators = {}
+            selectors = self.platform_configs.get(platform_name, {}).get("selectors", ["article", ".main-content", ".content", "main"])
             
             # For zeotap or at deeper levels, go directly to Selenium as it's likely a React app
             if platform_name == "zeotap" or depth > 2:
-                selectors = self.platform_configs.get(platform_name, {}).get("selectors", [])
                 content_elements, soup = self._scrape_with_selenium(url, selectors)
             else:
                 # Original code for other platforms
                 try:
-                    response = self.session.get(url, headers=self.headers, timeout=15)
+                    # Stale entries are revalidated: a 304 or an identical body skips parsing entirely
+                    with self.metrics.phase("fetch"):
+                        response = self.fetcher.get(url, headers=self._conditional_headers(cached if reusable else None))
+                    self.metrics.count("bytes", response.wire_bytes)  # As transferred, still compressed
+                    if reusable and response.status_code == 304:
+                        return self._revalidated(url, cached)
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
                     
-                    selectors = self.platform_configs.get(platform_name, {}).get("selectors", ["article", ".main-content", ".content", "main"])
+                    content_hash = hashlib.sha256(response.content).hexdigest()
+                    if reusable and cached.get("content_hash") == content_hash:
+                        return self._revalidated(url, cached)
+                    validators = {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "content_hash": content_hash
+                    }
                     
-                    for selector in selectors:
-                        content_elements = soup.select(selector)
-                        if content_elements:
-                            break
+                    with self.metrics.phase("parse"):
+                        soup = BeautifulSoup(response.text, 'html.parser')
+                    
+                    with self.metrics.phase("select"):
+                        for selector in selectors:
+                            content_elements = soup.select(selector)
+                            if content_elements:
+                                break
                     
                     if not content_elements:
                         logging.warning(f"No content found with selectors {selectors}. Trying Selenium.")
                         content_elements, soup = self._scrape_with_selenium(url, selectors)
                 except requests.exceptions.RequestException as e:
+                    # Transient errors were already retried by the fetcher; a browser wouldn't do better
+                    if is_transient_error(e) or isinstance(e, ResponseTooLarge):
+                        logging.error(f"Giving up on {url}: {str(e)}")
+                        return [], []
                     logging.warning(f"Request failed for {url}: {str(e)}. Trying Selenium.")
                     content_elements, soup = self._scrape_with_selenium(url, selectors)
             
             # If still no content or soup, return empty
             if not content_elements or not soup:
                 logging.warning(f"No content found on {url}.")
-                return []
+                return [], []
             
-            scraped_data = []
-            for element in content_elements:
-                text_content = element.get_text(separator='\n', strip=True)
-                
-                if not self._is_relevant_content(text_content):
-                    continue  
+            with self.metrics.phase("extract"):
+                # Nested selector matches repeat their parent's text; keep only the outermost elements
+                selected = {id(element) for element in content_elements}
+                content_elements = [element for element in content_elements
+                                    if not any(id(parent) in selected for parent in element.parents)]
                 
-                # Additional metadata extraction
+                # Additional metadata extraction (page-level, so once per page)
                 metadata = self._extract_metadata(soup, url, platform_name)
                 
-                scraped_data.append({
-                    "url": url,
-                    "title": metadata["title"],
-                    "platform": platform_name,
-                    "category": metadata["category"],
-                    "content": text_content,
-                    "html": str(element)
-                })
-            
-            # Save current data to cache before recursing
-            self._save_to_cache(url, scraped_data)
-            
-            # Process discovered links with recursion limiter
-            if depth < max_depth - 1:  # Only process links if not at max_depth-1
-                domain = urlparse(url).netloc
-                links_to_scrape = []
+                scraped_data = []
+                for element in content_elements:
+                    text_content = element.get_text(separator='\n', strip=True)
                 
-                if platform_name == "zeotap":
-                    doc_terms = self.platform_configs.get(platform_name, {}).get("doc_terms", ['docs', 'how', 'guide'])
-                    links_to_scrape = self._extract_links_selenium(url, doc_terms)
-                    # Filter links to keep only domain-specific ones and not already visited
-                    links_to_scrape = [link for link in links_to_scrape 
-                                     if urlparse(link).netloc == domain and link not in self.visited_urls]
-                else:
-                    # Original link extraction code
-                    for a_tag in soup.find_all('a', href=True):
-                        href = a_tag['href']
-                        full_url = urljoin(url, href)
-                        
-                        if urlparse(full_url).netloc == domain and full_url not in self.visited_urls:
-                            doc_terms = self.platform_configs.get(platform_name, {}).get("doc_terms", ['docs', 'how', 'guide'])
-                            if self._is_documentation_link(full_url, href, doc_terms):
-                                links_to_scrape.append(full_url)
+                    if not self._is_relevant_content(text_content):
+                        continue  
                 
-                # Limit number of links to scrape at each level to prevent explosion
-                max_links_per_level = 10
-                links_to_scrape = links_to_scrape[:max_links_per_level]
+                    scraped_data.append({
+                        "url": canonicalize_url(url),
+                        "title": metadata["title"],
+                        "platform": platform_name,
+                        "category": metadata["category"],
+                        "content": text_content,
+                        "html": str(element)
+                    })
                 
-                for link in links_to_scrape:
-                    time.sleep(wait_time)
-                    additional_data = self.scrape_url(link, platform_name, max_pages, wait_time, depth+1)
-                    scraped_data.extend(additional_data)
+                # Links come from the same soup as the content, so a rendered page is never loaded twice
+                links = self._extract_links(soup, url, platform_name)
             
-            return scraped_data
+            with self.metrics.phase("cache"):
+                self._save_to_cache(url, {"records": scraped_data, "links": links, **validators})
+            return scraped_data, links
         
         except Exception as e:
             logging.error(f"Error scraping {url}: {str(e)}")
-            # If we get a Selenium error, reset the driver
-            if isinstance(e, (WebDriverException, InvalidSessionIdException)):
-                self.reset_driver()
-            return []
+            return [], []
+    
+    def _extract_links(self, soup, url, platform_name):
+        """Same-domain documentation links on the page; the scheduler applies depth and per-level limits"""
+        domain = urlparse(url).netloc
+        doc_terms = self.platform_configs.get(platform_name, {}).get("doc_terms", ['docs', 'how', 'guide'])
+        links = []
+        for a_tag in soup.find_all('a', href=True):
+            href = a_tag['href']
+            full_url = urljoin(url, href)
+            
+            if urlparse(full_url).netloc == domain and self._is_documentation_link(full_url, href, doc_terms):
+                links.append(full_url)
+        return links
     
     def _extract_metadata(self, soup, url, platform_name):
         """Extract additional metadata from the page"""
@@ -388,14 +464,12 @@ class CDPScraper:
         return any(phrase in text.lower() for phrase in relevant_phrases)
     
     def save_data(self, data, platform_name):
-        """Save scraped data to JSON file"""
-        filename = os.path.join(self.output_dir, f"{platform_name}_howto.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        logging.info(f"Saved {len(data)} guides to {filename}")
+        """Append scraped records to the platform's corpus shard"""
+        self.corpus.append(platform_name, data)
+        logging.debug(f"Saved {len(data)} guides for {platform_name}")
     
-    def scrape_cdp_guides(self):
-        """Main method to scrape all CDP platforms"""
+    def scrape_cdp_guides(self, resume=True):
+        """Main method to scrape all CDP platforms, resuming an interrupted run if one left a checkpoint"""
         sources = {
             "segment": "https://segment.com/docs/?ref=nav",
             "mparticle": "https://docs.mparticle.com/",
@@ -403,41 +477,44 @@ class CDPScraper:
             "zeotap": "https://docs.zeotap.com/home/en-us/"
         }
         
-        all_data = {}
+        # The frontier and visited set are checkpointed next to the corpus as the crawl goes
+        checkpoint = CrawlCheckpoint(os.path.join(self.output_dir, "crawl_checkpoint.db"))
+        if resume and checkpoint.has_state():
+            # Pages already in the corpus are kept: drop a half-written tail left by the crash,
+            # then re-seed the duplicate filter with them
+            for platform in sources:
+                self.corpus.repair(platform)
+            for record in iter_records(self.output_dir):
+                self.duplicates.is_duplicate(record["content"])
+        else:
+            checkpoint.clear()
+            for platform in sources:
+                self.corpus.reset(platform)
         
-        for platform, url in sources.items():
-            try:
-                logging.info(f"Starting scrape of {platform} guides...")
-                data = self.scrape_url(url, platform_name=platform, max_pages=200)
-                self.save_data(data, platform)
-                all_data[platform] = data
-                
-                logging.info(f"Completed {platform} scrape. Pages visited: {self.pages_visited}, driver resets: {self.driver_resets}")
-                
-                # Reset counters and visited URLs between platforms
-                self.visited_urls.clear()
-                self.pages_visited = 0
-                self.driver_resets = 0
-                
-                # Always reset driver between platforms
-                self.reset_driver()
-                time.sleep(5)  # Longer pause between platforms
-                
-            except Exception as e:
-                logging.error(f"Failed to scrape {platform}: {str(e)}")
-                continue
+        # All platforms crawl in parallel; the per-domain limiter keeps each site's load polite.
+        # Each page is written out as soon as it is scraped, so nothing accumulates in memory.
+        logging.info(f"Starting scrape of {', '.join(sources)} guides...")
+        counts = self._make_scheduler().crawl(sources, max_pages=200, visited=self.visited_urls,
+                                              on_records=lambda platform, records: self.save_data(records, platform),
+                                              checkpoint=checkpoint)
+        checkpoint.clear()  # Finished: the next run starts a fresh crawl
+        checkpoint.close()
+        
+        for platform, count in counts.items():
+            logging.info(f"Completed {platform} scrape: {count} guides")
         
-        # Save a consolidated file with all platforms
-        consolidated_file = os.path.join(self.output_dir, "all_cdp_guides.json")
-        with open(consolidated_file, 'w', encoding='utf-8') as f:
-            json.dump(all_data, f, ensure_ascii=False, indent=2)
+        logging.info(f"Pages visited: {self.pages_visited}, unchanged: {self.pages_unchanged}, driver resets: {self.driver_resets}")
+        logging.info(f"HTTP fetches: {self.fetcher.stats()}")
+        logging.info(f"Duplicates dropped: {self.duplicates.exact_duplicates} exact, "
+                     f"{self.duplicates.near_duplicates} near")
+        for platform, stats in self.metrics.summary()["platforms"].items():
+            logging.info(f"{platform}: {stats['pages']} pages at {stats['pages_per_second']:.2f} pages/s, "
+                         f"cache hit rate {stats['cache_hit_rate']:.0%}, {stats['bytes']} bytes")
+        self.metrics.write(self.output_dir)
         
         logging.info("Scraping Complete.")
         
-        try:
-            self.driver.quit()  # Close the Selenium driver
-        except:
-            pass  # Ignore errors during final quit
+        self.close()  # Close the Selenium drivers
 
 # Example usage
 if __name__ == "__main__":
@@ -449,9 +526,8 @@ if __name__ == "__main__":
         scraper.scrape_cdp_guides()
     except Exception as e:
         logging.critical(f"Critical error in scraper: {str(e)}")
-        # Try to clean up WebDriver if possible
+        # Try to clean up WebDrivers if possible
         try:
-            if hasattr(scraper, 'driver') and scraper.driver:
-                scraper.driver.quit()
+            scraper.close()
         except:
             pass
\ No newline at end of file
@@ -0,0 +1,34 @@
+import os
+from atomic_dir import publish_dir, resolve
+
+
+def write_marker(value):
+    def write(directory):
+        os.makedirs(directory)
+        with open(os.path.join(directory, "marker"), 'w', encoding='utf-8') as f:
+            f.write(value)
+    return write
+
+
+def read_marker(path):
+    with open(os.path.join(resolve(path), "marker"), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_republish_swaps_link_and_keeps_one_previous_version(tmp_path):
+    path = str(tmp_path / "index")
+    for value in ("one", "two", "three"):
+        publish_dir(path, write_marker(value))
+        assert read_marker(path) == value
+    assert os.path.islink(path)
+    versions = sorted(name for name in os.listdir(tmp_path) if name.startswith("index.v"))
+    assert len(versions) == 2  # The current version and the one before it
+
+
+def test_directory_published_before_versioning_is_replaced(tmp_path):
+    path = str(tmp_path / "index")
+    write_marker("legacy")(path)
+    publish_dir(path, write_marker("new"))
+    assert os.path.islink(path)
+    assert read_marker(path) == "new"
+    assert sorted(os.listdir(tmp_path)) == ["index", os.path.basename(resolve(path))]
@@ -0,0 +1,68 @@
+import random
+import numpy as np
+import pytest
+import bm25_index
+from bm25_index import BM25Index
+
+
+@pytest.fixture(autouse=True)
+def plain_tokens(monkeypatch):
+    # Scoring doesn't depend on the normalizer; skip stemming and the NLTK data it needs
+    monkeypatch.setattr(bm25_index, "normalize", lambda text: text.lower())
+
+
+def brute_force(index, query, top_k):
+    """Exhaustive BM25 over every posting of every query term, ties broken by doc id"""
+    scores = np.zeros(len(index))
+    for token in set(query.lower().split()):
+        term_id = index.vocabulary.get(token)
+        if term_id is None:
+            continue
+        start, end = index.indptr[term_id], index.indptr[term_id + 1]
+        np.add.at(scores, index.doc_ids[start:end], index.impacts[start:end])
+    docs = np.flatnonzero(scores)
+    order = np.lexsort((docs, -scores[docs]))[:top_k]
+    return [(scores[doc], doc) for doc in docs[order]]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = random.Random(0)
+    vocab = [f"term{i}" for i in range(800)]
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    return vocab, [" ".join(rng.choices(vocab, weights, k=rng.randint(5, 120))) for _ in range(3000)]
+
+
+def test_search_matches_brute_force(corpus, tmp_path):
+    vocab, documents = corpus
+    index = BM25Index(documents)
+    index.save(tmp_path)
+    loaded = BM25Index.load(tmp_path)
+    rng = random.Random(1)
+    for _ in range(200):
+        query = " ".join(rng.choices(vocab[:100], k=rng.randint(1, 5)) + [rng.choice(vocab[300:])])
+        top_k = rng.choice([1, 5, 10, 50])
+        expected = brute_force(index, query, top_k)
+        for searched in (index, loaded):
+            results = searched.search(query, top_k)
+            assert len(results) == len(expected)
+            assert np.allclose([score for score, _ in results], [score for score, _ in expected], atol=1e-5)
+            # Exact ties may come back in either order; every returned score must be the document's true score
+            true_scores = {doc: score for score, doc in brute_force(index, query, len(index))}
+            for score, doc in results:
+                assert score == pytest.approx(true_scores[doc], abs=1e-5)
+
+
+def test_unknown_terms_and_empty_queries():
+    index = BM25Index(["segment sources", "lytics audiences"])
+    assert index.search("zeotap") == []
+    assert index.search("") == []
+    assert index.search("segment", top_k=0) == []
+    assert [doc for _, doc in index.search("segment lytics", top_k=5)] == [0, 1]
+
+
+def test_load_rejects_other_normalizer(tmp_path, monkeypatch):
+    BM25Index(["segment sources"]).save(tmp_path)
+    monkeypatch.setattr(bm25_index, "NORMALIZER_VERSION", "other")
+    with pytest.raises(ValueError):
+        BM25Index.load(tmp_path)
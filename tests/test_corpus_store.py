@@ -0,0 +1,48 @@
+import os
+import pytest
+from corpus_store import CorpusWriter, _complete_length, iter_records, iter_records_with_html
+
+
+def write_pages(writer, count):
+    for i in range(count):
+        writer.append("segment", [{"url": f"https://segment.com/docs/{i}", "content": "x" * 200,
+                                   "html": f"<p>{i}</p>"}])
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_complete_length_stops_before_a_cut_off_record(tmp_path, compress):
+    writer = CorpusWriter(tmp_path, compress)
+    write_pages(writer, 3)
+    records_path, _ = writer._paths("segment")
+    whole = os.path.getsize(records_path)
+    assert _complete_length(records_path) == whole
+    write_pages(writer, 1)
+    with open(records_path, "r+b") as f:
+        f.truncate(os.path.getsize(records_path) - 5)
+    assert _complete_length(records_path) == whole
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_repair_lets_a_resumed_crawl_append_after_a_crash(tmp_path, compress):
+    writer = CorpusWriter(tmp_path, compress)
+    write_pages(writer, 4)
+    for path in writer._paths("segment"):
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 5)
+
+    writer.repair("segment")
+    writer.append("segment", [{"url": "https://segment.com/docs/new", "content": "y", "html": "<p>new</p>"}])
+
+    records = list(iter_records_with_html(tmp_path))
+    assert [record["url"].rsplit("/", 1)[1] for record in records] == ["0", "1", "2", "new"]
+    assert records[-1]["html"] == "<p>new</p>"
+
+
+def test_unreadable_line_is_skipped(tmp_path):
+    writer = CorpusWriter(tmp_path, compress=False)
+    write_pages(writer, 1)
+    records_path, _ = writer._paths("segment")
+    with open(records_path, "a", encoding="utf-8") as f:
+        f.write('{"url": "half\n')
+    write_pages(writer, 1)
+    assert len(list(iter_records(tmp_path))) == 2
@@ -0,0 +1,46 @@
+import pytest
+from crawl_checkpoint import CrawlCheckpoint
+from crawl_scheduler import CrawlScheduler, DomainLimiter
+
+ROOT = "https://docs.example.com/"
+PAGES = [f"{ROOT}page{i}" for i in range(6)]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def make_fetch(fetched):
+    def fetch_page(url, platform, depth):
+        fetched.append(url)
+        return [{"url": url}], PAGES if url == ROOT else []
+    return fetch_page
+
+
+def test_resume_only_refetches_pages_in_flight(tmp_path):
+    path = str(tmp_path / "crawl_checkpoint.db")
+    first, stored = [], []
+
+    def store_then_crash(platform, records):
+        if len(stored) == 3:
+            raise Interrupted()
+        stored.extend(record["url"] for record in records)
+
+    scheduler = CrawlScheduler(make_fetch(first), max_workers=2, limiter=DomainLimiter(2, 0),
+                               max_links_per_page=len(PAGES))
+    checkpoint = CrawlCheckpoint(path)
+    with pytest.raises(Interrupted):
+        scheduler.crawl({"example": ROOT}, checkpoint=checkpoint, on_records=store_then_crash)
+    checkpoint.close()
+
+    checkpoint = CrawlCheckpoint(path)
+    _, _, pending = checkpoint.load()
+    second = []
+    scheduler.fetch_page = make_fetch(second)
+    results = scheduler.crawl({"example": ROOT}, checkpoint=checkpoint)
+    checkpoint.close()
+
+    assert sorted(second) == sorted(url for url, _, _ in pending)
+    assert not set(second) & set(stored)
+    assert set(stored) | set(second) == {ROOT, *PAGES}
+    assert len(results["example"]) == len(second)
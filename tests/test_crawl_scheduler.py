@@ -0,0 +1,38 @@
+import threading
+import time
+from crawl_scheduler import CrawlScheduler, DomainLimiter
+
+INTERVAL = 0.05
+SEEDS = {"a": "https://a.com/", "b": "https://b.com/"}
+
+
+def test_domains_are_dispatched_round_robin_with_their_interval():
+    starts, active, peak = [], {}, {}
+    lock = threading.Lock()
+
+    def fetch_page(url, platform, depth):
+        with lock:
+            starts.append((time.monotonic(), platform))
+            active[platform] = active.get(platform, 0) + 1
+            peak[platform] = max(peak.get(platform, 0), active[platform])
+        # b's links show up after a's, which used to leave every worker parked on a.com
+        time.sleep(0.03 if url == SEEDS["b"] else 0.01)
+        with lock:
+            active[platform] -= 1
+        links = [f"{url}page{i}" for i in range(6)] if url in SEEDS.values() else []
+        return [{"url": url}], links
+
+    scheduler = CrawlScheduler(fetch_page, max_workers=4, limiter=DomainLimiter(1, INTERVAL),
+                               max_links_per_page=6)
+    results = scheduler.crawl(SEEDS, max_pages=7)
+
+    assert {platform: len(records) for platform, records in results.items()} == {"a": 7, "b": 7}
+    assert peak == {"a": 1, "b": 1}
+    for platform in SEEDS:
+        times = [start for start, name in starts if name == platform]
+        assert all(later - earlier >= INTERVAL * 0.9 for earlier, later in zip(times, times[1:]))
+    # Neither site waits behind the other's queue: b starts its second page before a starts its fourth
+    order = [name for _, name in starts]
+    second_b = [i for i, name in enumerate(order) if name == "b"][1]
+    fourth_a = [i for i, name in enumerate(order) if name == "a"][3]
+    assert second_b < fourth_a
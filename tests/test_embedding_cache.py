@@ -0,0 +1,63 @@
+import json
+import os
+import numpy as np
+from embedding_cache import EmbeddingCache
+
+
+class CountingModel:
+    """Deterministic stand-in for a SentenceTransformer that counts encoded texts"""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        return np.array([[len(text), sum(map(ord, text)) % 97, 1.0] for text in texts], dtype=np.float32)
+
+
+TEXTS = ["set up a source", "create an audience", "configure identity resolution"]
+
+
+def test_unchanged_corpus_is_served_from_disk(tmp_path):
+    model = CountingModel()
+    first = np.array(EmbeddingCache(tmp_path, "m").encode(model, TEXTS))
+    again = EmbeddingCache(tmp_path, "m").encode(model, TEXTS)
+    assert model.encoded == len(TEXTS)
+    assert isinstance(again, np.memmap)
+    assert np.array_equal(first, again)
+
+
+def test_reordered_corpus_reuses_rows_and_drops_old_matrix(tmp_path):
+    model = CountingModel()
+    cache = EmbeddingCache(tmp_path, "m")
+    cache.encode(model, TEXTS)
+    reordered = np.array(cache.encode(model, TEXTS[::-1]))
+    assert model.encoded == len(TEXTS)
+    assert np.array_equal(reordered, model.encode(TEXTS[::-1]))
+    assert len([name for name in os.listdir(cache.cache_dir) if name.endswith(".npy")]) == 1
+
+
+def test_crash_between_matrix_and_key_list_keeps_the_old_pair(tmp_path):
+    model = CountingModel()
+    cache = EmbeddingCache(tmp_path, "m")
+    expected = np.array(cache.encode(model, TEXTS))
+    with open(cache.keys_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    # The reordered matrix reached disk but keys.json was never replaced
+    np.save(os.path.join(cache.cache_dir, "embeddings-0123.npy"), expected[::-1])
+    keys, embeddings = cache._load()
+    assert keys == meta["keys"]
+    assert np.array_equal(embeddings, expected)
+
+
+def test_key_list_not_matching_its_matrix_is_rebuilt(tmp_path):
+    model = CountingModel()
+    cache = EmbeddingCache(tmp_path, "m")
+    cache.encode(model, TEXTS)
+    with open(cache.keys_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    meta["keys"] = meta["keys"][::-1]
+    with open(cache.keys_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    assert cache._load() == ([], None)
+    assert np.array_equal(cache.encode(model, TEXTS), model.encode(TEXTS))
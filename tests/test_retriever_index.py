@@ -0,0 +1,62 @@
+import numpy as np
+from retriever import Retriever
+from vector_index import build_index, build_params, save_index_atomic
+
+EMBEDDINGS = np.random.default_rng(0).normal(size=(40, 8)).astype(np.float32)
+
+
+def bare_retriever(embeddings=EMBEDDINGS, fingerprint="corpus-a", shared_dir=None):
+    """A Retriever with just what _load_or_build_index needs, so no model has to load"""
+    retriever = Retriever.__new__(Retriever)
+    retriever.fingerprint = fingerprint
+    retriever.question_embeddings = embeddings
+    retriever.shared_dir = shared_dir
+    return retriever
+
+
+def publish(path, kind="brute", embeddings=EMBEDDINGS, **metadata):
+    metadata.setdefault("build_params", build_params(kind))
+    save_index_atomic(build_index(embeddings, kind), str(path), **metadata)
+
+
+def test_matching_index_is_reused(tmp_path):
+    publish(tmp_path / "index", corpus_fingerprint="corpus-a")
+    index = bare_retriever()._load_or_build_index("brute", str(tmp_path / "index"), {})
+    assert index.metadata["corpus_fingerprint"] == "corpus-a"
+
+
+def test_index_for_another_corpus_is_rebuilt(tmp_path):
+    publish(tmp_path / "index", corpus_fingerprint="corpus-b")
+    index = bare_retriever()._load_or_build_index("brute", str(tmp_path / "index"), {})
+    assert not hasattr(index, "metadata")
+
+
+def test_index_without_fingerprint_is_rebuilt_even_with_the_same_size(tmp_path):
+    publish(tmp_path / "index")
+    index = bare_retriever()._load_or_build_index("brute", str(tmp_path / "index"), {})
+    assert not hasattr(index, "metadata")
+
+
+def test_index_with_other_dimension_is_rebuilt(tmp_path):
+    publish(tmp_path / "index", embeddings=EMBEDDINGS[:, :4], corpus_fingerprint="corpus-a")
+    index = bare_retriever()._load_or_build_index("brute", str(tmp_path / "index"), {})
+    assert index.store.codes.shape == EMBEDDINGS.shape
+
+
+def test_index_with_other_kind_or_params_is_rebuilt(tmp_path):
+    publish(tmp_path / "index", corpus_fingerprint="corpus-a")
+    index = bare_retriever()._load_or_build_index("ivf", str(tmp_path / "index"), {})
+    assert index.kind == "ivf" and not hasattr(index, "metadata")
+
+    publish(tmp_path / "index", kind="ivf", corpus_fingerprint="corpus-a")
+    index = bare_retriever()._load_or_build_index("ivf", str(tmp_path / "index"), {"n_probe": 2})
+    assert index.n_probe == 2 and not hasattr(index, "metadata")
+
+
+def test_shared_index_is_republished_with_the_new_settings(tmp_path):
+    shared = bare_retriever(shared_dir=str(tmp_path))
+    path = str(tmp_path / "index")
+    assert shared._load_or_build_index("brute", path, {}).metadata["kind"] == "brute"
+    assert shared._load_or_build_index("ivf", path, {"n_probe": 2}).metadata["build_params"] == build_params("ivf", n_probe=2)
+    reused = bare_retriever(shared_dir=str(tmp_path))._load_or_build_index("ivf", path, {"n_probe": 2})
+    assert reused.kind == "ivf" and reused.n_probe == 2
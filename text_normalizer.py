@@ -0,0 +1,51 @@
+import re
+import threading
+from functools import lru_cache
+
+# Bump whenever normalize() can produce different output for the same text; processed
+# text, embedding caches and indexes built under another version are treated as stale.
+NORMALIZER_VERSION = "porter-1"
+
+TOKEN_CACHE_SIZE = 100000
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_lock = threading.Lock()
+_stop_words = None
+_stemmer = None
+
+
+def _load():
+    """Load the stop-word set and stemmer once per process (pool workers included)"""
+    global _stop_words, _stemmer
+    with _lock:
+        if _stemmer is None:
+            import nltk
+            try:
+                nltk.data.find('corpora/stopwords')
+            except LookupError:
+                nltk.download('stopwords', quiet=True)
+            from nltk.corpus import stopwords
+            from nltk.stem import PorterStemmer
+            _stop_words = frozenset(stopwords.words('english'))
+            _stemmer = PorterStemmer()
+
+
+def get_stop_words():
+    if _stemmer is None:
+        _load()
+    return _stop_words
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def normalize_token(word):
+    """Stem of one lowercased token; vocabularies repeat heavily, so results are memoized"""
+    if _stemmer is None:
+        _load()
+    return _stemmer.stem(word)
+
+
+def normalize(text):
+    """Lowercase, strip punctuation, drop stop words and stem: used for documents and queries alike"""
+    stop_words = get_stop_words()
+    tokens = _PUNCTUATION_RE.sub('', text.lower()).split()
+    return ' '.join(normalize_token(word) for word in tokens if word not in stop_words)
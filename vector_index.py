@@ -0,0 +1,391 @@
+import argparse
+import inspect
+import json
+import logging
+import os
+import numpy as np
+from atomic_dir import publish_dir, resolve
+
+QUANTIZATIONS = ("float32", "float16", "int8")
+
+
+def normalize_rows(vectors):
+    """L2-normalize rows so that inner product equals cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores, ids, top_k):
+    """Return the best `top_k` (scores, ids) in descending order using a partial sort"""
+    if len(scores) > top_k:
+        part = np.argpartition(-scores, top_k - 1)[:top_k]
+        scores, ids = scores[part], ids[part]
+    order = np.argsort(-scores, kind='stable')
+    return scores[order], ids[order]
+
+
+class VectorStore:
+    """Corpus rows kept as float32, float16 or int8 (symmetric per-dimension scalar quantization).
+
+    Scores are always computed in float32, a chunk of rows at a time, so the
+    full-precision matrix never has to be materialized.
+    """
+
+    def __init__(self, vectors, quantization="float32"):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.quantization = quantization
+        self.scale = None
+        if quantization == "int8":
+            max_abs = np.abs(vectors).max(axis=0) if len(vectors) else np.ones(vectors.shape[1])
+            self.scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+            self.codes = np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+        elif quantization == "float16":
+            self.codes = vectors.astype(np.float16)
+        else:
+            self.codes = vectors
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def scores(self, queries, rows=None, chunk_size=65536):
+        """Inner products of (normalized) queries with every stored row, or only with `rows`"""
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.scale is not None:
+            # (q * s) . c == q . (c * s), so dequantization folds into the query
+            queries = queries * self.scale
+        if self.quantization == "float32":
+            return queries @ codes.T
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), chunk_size):
+            out[:, start:start + chunk_size] = queries @ codes[start:start + chunk_size].astype(np.float32).T
+        return out
+
+    def save(self, path, name):
+        np.save(os.path.join(path, f"{name}.npy"), self.codes)
+        if self.scale is not None:
+            np.save(os.path.join(path, f"{name}_scale.npy"), self.scale)
+
+    @classmethod
+    def load(cls, path, name, quantization):
+        store = cls.__new__(cls)
+        store.quantization = quantization
+        store.codes = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+        store.scale = np.load(os.path.join(path, f"{name}_scale.npy")) if quantization == "int8" else None
+        return store
+
+
+def _rescore(queries, ids, rescore_vectors, top_k):
+    """Re-rank approximate candidates with exact float32 cosine scores"""
+    out_scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+    out_ids = np.full((len(queries), top_k), -1, dtype=np.int64)
+    for qi, row_ids in enumerate(ids):
+        row_ids = row_ids[row_ids >= 0]
+        if len(row_ids) == 0:
+            continue
+        # Sorted gather keeps reads from a memory-mapped matrix sequential
+        row_ids = np.sort(row_ids)
+        exact = normalize_rows(rescore_vectors[row_ids]) @ queries[qi]
+        scores, row_ids = _top_k(exact, row_ids, top_k)
+        out_scores[qi, :len(scores)] = scores
+        out_ids[qi, :len(row_ids)] = row_ids
+    return out_scores, out_ids
+
+
+class BruteForceIndex:
+    """Cosine search by scanning every row; exact unless the rows are quantized"""
+
+    kind = "brute"
+
+    def __init__(self, embeddings, quantization="float32", rescore_factor=4):
+        self.store = VectorStore(normalize_rows(embeddings), quantization)
+        # With quantized rows, fetch top_k * rescore_factor and re-rank them against
+        # `rescore_vectors` (the float32 corpus, usually memory-mapped) when it is set
+        self.rescore_factor = rescore_factor
+        self.rescore_vectors = None
+
+    def __len__(self):
+        return len(self.store)
+
+    def search(self, queries, top_k=1, chunk_size=256):
+        """Return (scores, ids) arrays of shape (n_queries, top_k)"""
+        queries = normalize_rows(queries)
+        top_k = min(top_k, len(self))
+        rescore = (self.store.quantization != "float32" and self.rescore_vectors is not None
+                   and self.rescore_factor > 1)
+        fetch_k = min(top_k * self.rescore_factor, len(self)) if rescore else top_k
+        out_scores = np.empty((len(queries), fetch_k), dtype=np.float32)
+        out_ids = np.empty((len(queries), fetch_k), dtype=np.int64)
+
+        # Score a chunk of queries with one matrix multiply, then partial-sort each row
+        for start in range(0, len(queries), chunk_size):
+            scores = self.store.scores(queries[start:start + chunk_size])
+            if fetch_k < len(self):
+                ids = np.argpartition(-scores, fetch_k - 1, axis=1)[:, :fetch_k]
+            else:
+                ids = np.broadcast_to(np.arange(len(self)), scores.shape)
+            scores = np.take_along_axis(scores, ids, axis=1)
+            order = np.argsort(-scores, axis=1, kind='stable')
+            out_scores[start:start + chunk_size] = np.take_along_axis(scores, order, axis=1)
+            out_ids[start:start + chunk_size] = np.take_along_axis(ids, order, axis=1)
+
+        if rescore:
+            return _rescore(queries, out_ids, self.rescore_vectors, top_k)
+        return out_scores, out_ids
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.store.save(path, "embeddings")
+        _write_meta(path, {"kind": self.kind, "size": len(self),
+                           "quantization": self.store.quantization,
+                           "rescore_factor": self.rescore_factor})
+
+    @classmethod
+    def load(cls, path, meta):
+        index = cls.__new__(cls)
+        index.store = VectorStore.load(path, "embeddings", meta.get("quantization", "float32"))
+        index.rescore_factor = meta.get("rescore_factor", 4)
+        index.rescore_vectors = None
+        return index
+
+
+class IVFIndex:
+    """Inverted-file ANN index: rows are bucketed by their nearest k-means centroid
+    and a query only scans the `n_probe` closest buckets.
+
+    Raising `n_probe` trades speed for recall; `n_probe == n_lists` is exact.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, embeddings, n_lists=None, n_probe=8, n_iter=20, seed=0,
+                 quantization="float32", rescore_factor=4):
+        embeddings = normalize_rows(embeddings)
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(len(embeddings))))
+        self.n_lists = min(n_lists, len(embeddings))
+        self.n_probe = n_probe
+        self.rescore_factor = rescore_factor
+        self.rescore_vectors = None
+        self.centroids = self._train(embeddings, n_iter, seed)
+
+        # Store rows grouped by list so each bucket is one contiguous slice
+        assignments = self._assign(embeddings)
+        self.ids = np.argsort(assignments, kind='stable')
+        self.store = VectorStore(embeddings[self.ids], quantization)
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _assign(self, vectors, chunk_size=8192):
+        """Nearest centroid for every row, computed in chunks to bound memory"""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = (chunk @ self.centroids.T).argmax(axis=1)
+        return assignments
+
+    def _train(self, embeddings, n_iter, seed):
+        """Spherical k-means on a sample of the corpus"""
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(embeddings), self.n_lists * 256)
+        sample = embeddings[rng.choice(len(embeddings), sample_size, replace=False)]
+        self.centroids = sample[rng.choice(len(sample), self.n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignments = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, sample)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty lists with random points so no centroid goes dead
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            self.centroids = normalize_rows(sums)
+        return self.centroids
+
+    def search(self, queries, top_k=1, n_probe=None):
+        """Return (scores, ids) arrays of shape (n_queries, top_k); missing slots hold id -1"""
+        queries = normalize_rows(queries)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        top_k = min(top_k, len(self))
+        rescore = (self.store.quantization != "float32" and self.rescore_vectors is not None
+                   and self.rescore_factor > 1)
+        fetch_k = min(top_k * self.rescore_factor, len(self)) if rescore else top_k
+        out_scores = np.full((len(queries), fetch_k), -np.inf, dtype=np.float32)
+        out_ids = np.full((len(queries), fetch_k), -1, dtype=np.int64)
+
+        centroid_scores = queries @ self.centroids.T
+        for qi, query in enumerate(queries):
+            probe = np.argpartition(-centroid_scores[qi], n_probe - 1)[:n_probe]
+            rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in probe])
+            if len(rows) == 0:
+                continue
+            scores, rows = _top_k(self.store.scores(query[None, :], rows)[0], rows, fetch_k)
+            out_scores[qi, :len(scores)] = scores
+            out_ids[qi, :len(rows)] = self.ids[rows]
+
+        if rescore:
+            return _rescore(queries, out_ids, self.rescore_vectors, top_k)
+        return out_scores, out_ids
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ("centroids", "ids", "offsets"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        self.store.save(path, "vectors")
+        _write_meta(path, {"kind": self.kind, "size": len(self),
+                           "n_lists": self.n_lists, "n_probe": self.n_probe,
+                           "quantization": self.store.quantization,
+                           "rescore_factor": self.rescore_factor})
+
+    @classmethod
+    def load(cls, path, meta):
+        index = cls.__new__(cls)
+        for name in ("centroids", "ids", "offsets"):
+            setattr(index, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r'))
+        index.store = VectorStore.load(path, "vectors", meta.get("quantization", "float32"))
+        index.n_lists = meta["n_lists"]
+        index.n_probe = meta["n_probe"]
+        index.rescore_factor = meta.get("rescore_factor", 4)
+        index.rescore_vectors = None
+        return index
+
+
+INDEX_TYPES = {cls.kind: cls for cls in (BruteForceIndex, IVFIndex)}
+
+
+def _write_meta(path, meta):
+    with open(os.path.join(path, "index.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _index_type(kind):
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index kind '{kind}', expected one of {sorted(INDEX_TYPES)}")
+    return INDEX_TYPES[kind]
+
+
+def build_index(embeddings, kind="brute", **params):
+    """Build an index of the given kind over the corpus embeddings"""
+    return _index_type(kind)(embeddings, **params)
+
+
+def build_params(kind, **params):
+    """Every build argument of `kind` with its defaults filled in, for recording in index.json.
+
+    Two configurations produce the same index exactly when these are equal.
+    """
+    bound = inspect.signature(_index_type(kind).__init__).bind(None, None, **params)
+    bound.apply_defaults()
+    return {name: value for name, value in bound.arguments.items() if name not in ("self", "embeddings")}
+
+
+def load_index(path):
+    """Load an index previously written with `save`; arrays are memory-mapped"""
+    path = resolve(path)  # A republish mid-load must not mix files from two versions
+    with open(os.path.join(path, "index.json"), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    index = INDEX_TYPES[meta["kind"]].load(path, meta)
+    index.metadata = meta
+    return index
+
+
+def save_index_atomic(index, path, **metadata):
+    """Save an index and publish it at `path` in one step, recording extra metadata in index.json.
+
+    Processes that already memory-mapped the old files keep reading them until they reload.
+    """
+    def write(directory):
+        index.save(directory)
+        with open(os.path.join(directory, "index.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        meta.update(metadata)
+        _write_meta(directory, meta)
+
+    publish_dir(path, write)
+
+
+def memory_report(index):
+    """Bytes held by the index's corpus rows compared with plain float32 storage"""
+    store = index.store
+    float32_bytes = len(store) * store.codes.shape[1] * 4 if len(store) else 0
+    return {
+        "quantization": store.quantization,
+        "bytes": store.nbytes,
+        "float32_bytes": float32_bytes,
+        "saved_bytes": float32_bytes - store.nbytes,
+        "compression": float32_bytes / store.nbytes if store.nbytes else 1.0
+    }
+
+
+def measure_recall(index, embeddings, queries, top_k=10):
+    """Recall@top_k of `index` against an exact float32 scan of `embeddings`"""
+    _, expected = BruteForceIndex(embeddings).search(queries, top_k)
+    _, found = index.search(queries, top_k)
+    hits = sum(len(set(e) & set(f[f >= 0])) for e, f in zip(expected, found))
+    return hits / expected.size if expected.size else 1.0
+
+
+# Build an index offline from a cached embedding matrix
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Build a vector index from an embeddings .npy file")
+    parser.add_argument("embeddings", help="Path to an embeddings .npy file (e.g. from embedding_cache/)")
+    parser.add_argument("output", help="Directory to write the index to")
+    parser.add_argument("--qa-pairs", default=None, help="QA pairs CSV the embeddings were computed from")
+    parser.add_argument("--passages", default=None, help="Passages CSV included in that corpus, if any")
+    parser.add_argument("--model", default=None, help="Model that produced the embeddings")
+    parser.add_argument("--kind", choices=sorted(INDEX_TYPES), default="ivf")
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="float32")
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--recall-sample", type=int, default=0,
+                        help="Report recall@10 on this many corpus rows used as queries")
+    args = parser.parse_args()
+
+    embeddings = np.load(args.embeddings, mmap_mode='r')
+    # Record which corpus the rows belong to, so the retriever only ever serves this index for it
+    from embedding_cache import content_keys
+    from retriever import DEFAULT_MODEL_NAME, corpus_fingerprint, load_corpus
+    from text_normalizer import NORMALIZER_VERSION
+    model_name = args.model or DEFAULT_MODEL_NAME
+    corpus = load_corpus(args.qa_pairs, args.passages)
+    if len(corpus) != len(embeddings):
+        parser.error(f"{args.embeddings} has {len(embeddings)} rows but the corpus has {len(corpus)}")
+    keys_path = os.path.join(os.path.dirname(os.path.abspath(args.embeddings)), "keys.json")
+    if os.path.exists(keys_path):
+        with open(keys_path, 'r', encoding='utf-8') as f:
+            cache_meta = json.load(f)
+        if (cache_meta.get("embeddings") != os.path.basename(args.embeddings)
+                or cache_meta.get("keys") != content_keys(model_name, corpus['processed_question'].tolist())):
+            parser.error(f"{args.embeddings} was not computed from this corpus with {model_name}")
+    else:
+        logging.warning(f"No keys.json next to {args.embeddings}; assuming its rows follow the corpus order")
+
+    params = {"quantization": args.quantization, "rescore_factor": args.rescore_factor}
+    if args.kind == "ivf":
+        params.update(n_lists=args.n_lists, n_probe=args.n_probe)
+    index = build_index(embeddings, args.kind, **params)
+    save_index_atomic(index, args.output, build_params=build_params(args.kind, **params),
+                      corpus_fingerprint=corpus_fingerprint(corpus, model_name),
+                      model_name=model_name, normalizer_version=NORMALIZER_VERSION)
+    logging.info(f"Saved {args.kind} index over {len(index)} rows to {args.output}")
+    logging.info(f"Memory: {memory_report(index)}")
+
+    if args.recall_sample:
+        sample = np.random.default_rng(0).choice(len(embeddings), min(args.recall_sample, len(embeddings)), replace=False)
+        queries = np.asarray(embeddings[np.sort(sample)])
+        logging.info(f"Recall@10 without rescoring: {measure_recall(index, embeddings, queries):.4f}")
+        index.rescore_vectors = embeddings
+        logging.info(f"Recall@10 with float32 rescoring: {measure_recall(index, embeddings, queries):.4f}")